@@ -1,24 +1,62 @@
-from urllib.parse import urlparse
 import requests
 import asyncio
 import aiohttp
-from typing import List, Dict, Any, Tuple
-from HTMLContentExtractor import HTMLContentExtractor
+from typing import List, Dict, Tuple, Optional, AsyncIterator
 import dotenv
 import os
+import time
 from browser import fetch_full_html
+from http_session import get_session
+from extraction_pool import extract_in_pool
+from rate_limiter import rate_limited, retry_after_seconds
+from article_cache import get_cached_article, store_article, store_html
+from extraction_result import ExtractionResult
 
 dotenv.load_dotenv()
 
 API_KEY = os.getenv("BRIGHT_DATA_API_KEY")
+EXTRACTION_TIMEOUT = 75  # seconds for a whole batch of URLs
+
+
+async def iter_completed(futures: Dict[asyncio.Future, str], timeout: float) -> AsyncIterator[ExtractionResult]:
+    """
+    Yields the results of `futures` ({future: url}) in completion order. Once
+    `timeout` seconds have passed, the unfinished ones are reported as timed out;
+    cancelling them is left to the caller.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    pending = dict(futures)
+    while pending:
+        done, _ = await asyncio.wait(pending, timeout=max(0.0, deadline - loop.time()),
+                                     return_when=asyncio.FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            url = pending.pop(future)
+            try:
+                yield future.result()
+            except asyncio.CancelledError:
+                yield ExtractionResult.failed(url, "Fetch cancelled")
+            except Exception as e:
+                print(f"Error getting task result: {str(e)}")
+                yield ExtractionResult.failed(url, str(e))
+    for url in pending.values():
+        print(f"Task for {url} timed out and was cancelled")
+        yield ExtractionResult.failed(url, "Operation timed out")
 
 class FastContentExtractor:
     def __init__(self, api_key: str = API_KEY, 
-                 zone: str = "web_scraper"):
+                 zone: str = "web_scraper", use_cache: bool = True, keep_html: bool = False):
+        """
+        keep_html: spill each fetched page to the article cache (see
+        article_cache.get_cached_html) instead of discarding it after extraction.
+        """
         self.api_key = api_key
         self.zone = zone
+        self.use_cache = use_cache
+        self.keep_html = keep_html
         self.api_url = "https://api.brightdata.com/request"
-        self.html_extractor = HTMLContentExtractor()
 
     async def __aenter__(self):
         return self
@@ -31,13 +69,18 @@ class FastContentExtractor:
         processed_results = {}
         
         for url, result in results_dict.items():
-            content = result.get('content', '')
-            success = result.get('success', False)
-            processed_results[url] = (content, success)
+            processed_results[url] = (result.content or '', result.success)
             
         return processed_results
 
-    async def _fetch_url(self, url: str, session: aiohttp.ClientSession) -> Dict[str, Any]:
+    async def _render_fallback(self, url: str) -> Optional[str]:
+        try:
+            return await fetch_full_html(url)
+        except Exception as e:
+            print(f"Browser fallback failed for {url}: {str(e)}")
+            return None
+
+    async def _fetch_url(self, url: str, session: aiohttp.ClientSession) -> ExtractionResult:
         try:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -52,135 +95,93 @@ class FastContentExtractor:
             # Create a timeout for the request
             timeout = aiohttp.ClientTimeout(total=20)  # 20 second timeout for the whole operation
             
-            async with session.post(self.api_url, headers=headers, json=payload, timeout=timeout) as response:
+            async with rate_limited("brightdata") as limiter, \
+                    session.post(self.api_url, headers=headers, json=payload, timeout=timeout) as response:
+                if response.status == 429:
+                    limiter.penalize(retry_after_seconds(response.headers, 10))
                 if response.status != 200:
                     print(f"Error: API returned status {response.status} for {url}")
-                    return {
-                        'url': url,
-                        'domain': urlparse(url).netloc,
-                        'raw_html': None,
-                        'content': None,
-                        'error': f"API error: {response.status}",
-                        'success': False
-                    }
+                    return ExtractionResult.failed(url, f"API error: {response.status}")
                 
                 raw_html = await response.text()
-                backup_html = await asyncio.to_thread(fetch_full_html, url)
 
-                if not raw_html or len(raw_html.strip()) < 1400:
-                    print(f"Error: Received empty or very short HTML for {url}: " + raw_html)
-                    if backup_html and len(backup_html.strip() > 2000):
-                        print(f"Using backup HTML for url: {url}")
-                        raw_html = backup_html
-                    else:  
-                        return {
-                            'url': url,
-                            'domain': urlparse(url).netloc,
-                            'raw_html': raw_html,
-                            'content': "Empty or very short HTML received: " + raw_html,
-                            'error': "Empty or very short HTML received",
-                            'success': False
-                        }
-                    
-                # Extract content using HTMLContentExtractor
-                processed_content = self.html_extractor.extract(url, raw_html)
-                
-                if not processed_content:
-                    print(f"Warning: Failed to extract content for {url}")
-                    return {
-                        'url': url,
-                        'domain': urlparse(url).netloc,
-                        'raw_html': raw_html,
-                        'content': None,
-                        'error': "Content extraction failed",
-                        'success': False
-                    }
+            if not raw_html or len(raw_html.strip()) < 1400:
+                print(f"Error: Received empty or very short HTML for {url}: " + raw_html)
+                # Only render in the browser when the primary HTML is unusable
+                backup_html = await self._render_fallback(url)
+                if backup_html and len(backup_html.strip()) > 2000:
+                    print(f"Using backup HTML for url: {url}")
+                    raw_html = backup_html
+                else:  
+                    return ExtractionResult.failed(
+                        url,
+                        "Empty or very short HTML received",
+                        content="Empty or very short HTML received: " + raw_html,
+                        html_bytes=len(raw_html.encode("utf-8")),
+                    )
+
+            html_bytes = len(raw_html.encode("utf-8"))
+            if self.keep_html:
+                store_html(url, raw_html)
                 
-                domain = urlparse(url).netloc
-                print(f"Successfully extracted {len(processed_content)} characters from {url}")
-                return {
-                    'url': url,
-                    'domain': domain,
-                    'raw_html': raw_html,
-                    'content': processed_content,
-                    'success': True
-                }
+            # Extract content with HTMLContentExtractor in the process pool; the raw
+            # page is not referenced past this point
+            processed_content = await extract_in_pool(url, raw_html)
+            del raw_html
+            
+            if not processed_content:
+                print(f"Warning: Failed to extract content for {url}")
+                return ExtractionResult.failed(url, "Content extraction failed", html_bytes=html_bytes)
+            
+            print(f"Successfully extracted {len(processed_content)} characters from {url}")
+            return ExtractionResult(
+                url,
+                content=processed_content,
+                success=True,
+                html_bytes=html_bytes,
+                fetched_at=time.time(),
+                has_html=self.keep_html,
+            )
         except asyncio.TimeoutError:
             print(f"Timeout error for {url}")
-            return {
-                'url': url,
-                'domain': urlparse(url).netloc,
-                'raw_html': None,
-                'content': None,
-                'error': "Request timed out",
-                'success': False
-            }
+            return ExtractionResult.failed(url, "Request timed out")
         except Exception as e:
             print(f"Error processing {url}: {str(e)}")
-            return {
-                'url': url,
-                'domain': urlparse(url).netloc,
-                'raw_html': None,
-                'content': None,
-                'error': str(e),
-                'success': False
-            }
+            return ExtractionResult.failed(url, str(e))
+
+    async def extract_one(self, url: str, session: Optional[aiohttp.ClientSession] = None) -> ExtractionResult:
+        """Extracts a single URL, serving it from the article cache when possible."""
+        if self.use_cache:
+            cached = get_cached_article(url)
+            if cached is not None:
+                print(f"Article cache hit for {url}")
+                return cached
+        result = await self._fetch_url(url, session or get_session("brightdata"))
+        if self.use_cache:
+            store_article(result)
+        return result
+
+    async def iter_content(self, urls: List[str], timeout: float = EXTRACTION_TIMEOUT) -> AsyncIterator[ExtractionResult]:
+        """
+        Yields extraction results as they complete, cached pages first. Closing the
+        iterator early (e.g. once enough good articles have arrived) cancels the
+        outstanding fetches.
+        """
+        session = get_session("brightdata")
+        tasks = {asyncio.create_task(self.extract_one(url, session)): url for url in dict.fromkeys(urls)}
+        try:
+            async for result in iter_completed(tasks, timeout):
+                yield result
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
 
-    async def extract_content(self, urls: List[str]) -> Dict[str, Any]:
+    async def extract_content(self, urls: List[str]) -> Dict[str, ExtractionResult]:
         results = {}
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                # Create tasks explicitly as required by asyncio
-                tasks = [asyncio.create_task(self._fetch_url(url, session)) for url in urls]
-                
-                # Set a timeout for the entire operation
-                timeout = 75  # 75 seconds total for all requests
-                
-                # Wait for tasks with timeout
-                done, pending = await asyncio.wait(tasks, timeout=timeout)
-                
-                # Handle completed tasks
-                for task in done:
-                    try:
-                        result = task.result()
-                        url = result['url']
-                        results[url] = result
-                    except Exception as e:
-                        print(f"Error getting task result: {str(e)}")
-                
-                # Handle pending tasks (timed out)
-                for task in pending:
-                    task.cancel()  # Cancel any pending tasks
-                    try:
-                        # Find the index of the task in our list (if possible)
-                        task_index = None
-                        for i, t in enumerate(tasks):
-                            if t == task:
-                                task_index = i
-                                break
-                        
-                        # Get the URL if we can find it
-                        url = urls[task_index] if task_index is not None else "unknown URL"
-                        print(f"Task for {url} timed out and was cancelled")
-                        results[url] = {
-                            'url': url,
-                            'domain': urlparse(url).netloc if url != "unknown URL" else "unknown",
-                            'raw_html': None,
-                            'content': None,
-                            'error': "Operation timed out",
-                            'success': False
-                        }
-                    except Exception as e:
-                        print(f"Error handling cancelled task: {str(e)}")
-        
+            async for result in self.iter_content(urls):
+                results[result.url] = result
         except Exception as e:
             print(f"Error in extract_content: {str(e)}")
-        
         return results
-
-
-
-
-
-
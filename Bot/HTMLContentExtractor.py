@@ -1,5 +1,9 @@
 import re
+import copy
+import time
 from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+from lxml.cssselect import CSSSelector
 from trafilatura import extract as trafilatura_extract, extract_metadata
 from readability import Document
 from boilerpy3 import extractors
@@ -8,186 +12,74 @@ import html as html_lib
 from typing import Optional, Dict, List, Tuple
 import unicodedata
 from difflib import SequenceMatcher
-from bs4 import Tag
+from content_cleaner import ContentCleaner
+from content_quality import content_quality, content_quality_batch
+from site_rules import SiteRules, compile_selectors, get_site_rules
+
+HIDDEN_STYLE_RE = re.compile(r'display:\s*none|visibility:\s*hidden')
+NOISE_ID_RE = re.compile(r'footer|banner|sidebar|comment')
+HEADER_ID_RE = re.compile(r'header')
+HEADER_NAV_RE = re.compile(r'(menu|navigation|logo|sign in)')
+AD_CLASS_RE = re.compile(r'(ad-|banner|promo|sponsored|recommendation)')
+CLUTTER_CLASS_RE = re.compile(r'share|social|comment|related|promo|ad|subscribe|newsletter')
+READABILITY_CLUTTER_RE = re.compile(r'ads|share|comment|social|promo|related')
+
+DEFAULT_SELECTORS = [
+    'article', '.article', '.article-body', '.content', '.entry-content',
+    'div[itemprop="articleBody"]', '.story-body', '.post-content', 'main'
+]
+DEFAULT_CSS_SELECTORS = compile_selectors(DEFAULT_SELECTORS)
+AUTHOR_SELECTORS = [CSSSelector(sel) for sel in ['.author', '.byline', '.writer', '[rel="author"]']]
+DATE_SELECTORS = [CSSSelector(sel) for sel in ['.date', '.published', '.timestamp', '.pubdate']]
+
+
+def _node_text(element) -> str:
+    """lxml equivalent of BeautifulSoup's get_text(separator=" ", strip=True)."""
+    return " ".join(t.strip() for t in element.itertext() if t.strip())
+
+
+def _drop(element):
+    if element.getparent() is not None:
+        element.drop_tree()
+
+
+class ParsedDocument:
+    """
+    An HTML document parsed once with lxml and shared by every extraction strategy.
+    Strategies that mutate the tree get their own deep copy (a C-level copy, much
+    cheaper than re-parsing); string-only strategies share one serialization.
+    """
+
+    def __init__(self, html_content: str):
+        try:
+            self.tree = lxml_html.document_fromstring(html_content)
+        except ValueError:
+            # Unicode strings with an XML encoding declaration must be parsed as bytes
+            self.tree = lxml_html.document_fromstring(html_content.encode('utf-8'))
+        self._html = None
+
+    def copy_tree(self):
+        return copy.deepcopy(self.tree)
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = etree.tostring(self.tree, encoding='unicode', method='html')
+        return self._html
+
 
 class HTMLContentExtractor:
     def __init__(self, site_configs: Optional[Dict[str, dict]] = None):
         self.extractor = extractors.ArticleExtractor()
-        if site_configs is None:
-            self.site_configs = {
-            'nytimes.com': {
-                'cookies': {'nyt-gdpr': 'accept'},
-                'headers': {'Referer': 'https://www.google.com/'},
-                'wait_time': 2,
-                'selectors': ['article#story', 'div.StoryBodyCompanionColumn'],
-                'remove_selectors': ['div.ad', 'div.comments', 'div.toolbar']
-            },
-            'reuters.com': {
-                'cookies': {'reuters-gdpr': 'accept'},
-                'headers': {'Referer': 'https://news.google.com/'},
-                'wait_time': 1,
-                'selectors': ['article.article-body', 'div[data-testid="Body"]'],
-                'remove_selectors': ['div.article-header', 'div.article-share']
-            },
-            'washingtonpost.com': {
-                'cookies': {'wp_gdpr': 'accept'},
-                'headers': {'Referer': 'https://www.google.com/'},
-                'wait_time': 2,
-                'selectors': ['div.article-body', 'article.main-content'],
-                'remove_selectors': ['div.interstitial', 'div.newsletter-inline-unit']
-            },
-            'economist.com': {
-                'cookies': {
-                    'economist-logged-in': 'true',
-                    'economist-analytics': 'disable'
-                },
-                'headers': {
-                    'Referer': 'https://www.google.com/',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Sec-Fetch-Site': 'none',
-                    'Sec-Fetch-Mode': 'navigate',
-                    'Sec-Fetch-User': '?1',
-                    'Sec-Fetch-Dest': 'document'
-                },
-                'selectors': [
-                    'article.article__body',
-                    'div.article__lead',
-                    'div.article__content',
-                    'p.article__body-text'
-                ],
-                'remove_selectors': [
-                    'div.advert',
-                    'div.article__footnote',
-                    'div.share-links',
-                    'div.newsletter-signup'
-                ]
-            },
-            'baltimoresun.com': {
-                'cookies': {'bsun-consent': 'accept'},
-                'headers': {
-                    'Referer': 'https://www.google.com/',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-                },
-                'wait_time': 2,
-                'selectors': [
-                    'div.body-copy',
-                    'article.story'
-                ],
-                'remove_selectors': [
-                    'div.map-container',
-                    'div#president',
-                    'div#senate',
-                    'div.time',
-                    'p.wp-remixd-voice-wrapper',
-                    'p[id^="container-embed"]'
-                ]
-            },
-            'bloomberg.com': {
-                'cookies': {
-                    'bb_geo_info': '{"country":"US","region":"NY"}',
-                    'bb_consent': 'express',
-                    'bb_subscriber': 'true'
-                },
-                'headers': {
-                    'Referer': 'https://www.google.com/',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Sec-Fetch-Site': 'none',
-                    'Sec-Fetch-Mode': 'navigate',
-                    'Sec-Fetch-User': '?1',
-                    'Sec-Fetch-Dest': 'document',
-                    'Accept-Language': 'en-US,en;q=0.9'
-                },
-                'wait_time': 3,
-                'selectors': [
-                    'div.body-content',
-                    'div.body-copy',
-                    'article.article-body'
-                ],
-                'remove_selectors': [
-                    'div.paywall',
-                    'div.newsletter-signup',
-                    'div.related-articles'
-                ]
-            },
-            'channelnewsasia.com': {
-                'cookies': {'cna-consent': 'accept'},
-                'headers': {
-                    'Referer': 'https://www.google.com/',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                },
-                'wait_time': 2,
-                'selectors': [
-                    'div.article-content',
-                    'div.article-body',
-                    'article',
-                    'div.article-text',
-                    'div.text-long'
-                ],
-                'remove_selectors': [
-                    'div.advertisement',
-                    'div.teaser',
-                    'div.partner-recommendations',
-                    'div.social-share',
-                    'div.also-worth-reading',
-                    'div.related-topics',
-                    'div[class*="partner"]'
-                ]
-            },
-            'cna.com.sg': {
-                'cookies': {'cna-consent': 'accept'},
-                'headers': {
-                    'Referer': 'https://www.google.com/',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                },
-                'wait_time': 2,
-                'selectors': [
-                    'div.article-content',
-                    'div.article-body',
-                    'article',
-                    'div.article-text',
-                    'div.text-long'
-                ],
-                'remove_selectors': [
-                    'div.advertisement',
-                    'div.teaser',
-                    'div.partner-recommendations',
-                    'div.social-share',
-                    'div.also-worth-reading',
-                    'div[class*="partner"]'
-                ]
-            },
-            'techcrunch.com': {
-                'cookies': {'tc-consent': 'accept'},
-                'headers': {
-                    'Referer': 'https://www.google.com/',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
-                },
-                'wait_time': 2,
-                'selectors': [
-                    'div.article-content',
-                    'p.wp-block-paragraph',
-                    'ul.wp-block-list',
-                    'li.wp-block-list-item',
-                    'h2.wp-block-heading',
-                    'h3.wp-block-heading'
-                ],
-                'remove_selectors': [
-                    'div[class*="ad"]',
-                    'div[class*="related"]',
-                    'div[class*="promo"]',
-                    'div[class*="footer"]',
-                    'div[class*="author"]',
-                    'aside',
-                    'nav',
-                    'header'
-                ]
-            }
-        }
-        else:
-            self.site_configs = site_configs
+        self.trafilatura_config = use_config()
+        if not self.trafilatura_config.has_section("EXTRACTION"):
+            self.trafilatura_config.add_section("EXTRACTION")
+        self.trafilatura_config.set("DEFAULT", "EXTRACTION_TIMEOUT", "0")
+        self.trafilatura_config.set("EXTRACTION", "favor_precision", "true")
+        self.last_timings: Dict[str, float] = {}
+        # Per-site rules come from site_rules.json unless the caller supplies its own
+        self.site_rules = get_site_rules() if site_configs is None else SiteRules(site_configs)
+        self.site_configs = self.site_rules.configs
             
         self.blacklist_patterns = [
             # Basic advertisement patterns
@@ -234,158 +126,170 @@ class HTMLContentExtractor:
             'click here', 'download', 'register', 'privacy policy', 'terms of service',
             'thanks for sharing', 'photo:', 'image:', 'published', 'updated'
         ]
-
-    def _preprocess_html(self, html_content: str) -> str:
-        """Pre-process HTML to improve extraction results."""
-        try:
-            # Remove common problematic elements
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Remove script, style, and SVG tags
-            for tag in soup.find_all(['script', 'style', 'svg', 'noscript']):
-                tag.decompose()
-                
-            # Remove hidden elements
-            for tag in soup.find_all(style=re.compile(r'display:\s*none|visibility:\s*hidden')):
-                tag.decompose()
-            
-            # Handle specific pattern issues
-            for div in soup.find_all('div', {'id': re.compile(r'footer|banner|sidebar|comment')}):
-                div.decompose()
-                
-            # Keep header elements that might contain article titles
-            for div in soup.find_all('div', {'id': re.compile(r'header')}):
+        self.cleaner = ContentCleaner(self.blacklist_patterns, self.removal_keywords)
+
+    def _preprocess_html(self, tree) -> None:
+        """Pre-process the parsed tree in place to improve extraction results."""
+        # Remove script, style, and SVG tags
+        for tag in list(tree.iter('script', 'style', 'svg', 'noscript')):
+            _drop(tag)
+            
+        # Remove hidden elements
+        for tag in tree.xpath('//*[@style]'):
+            if HIDDEN_STYLE_RE.search(tag.get('style', '')):
+                _drop(tag)
+        
+        # Handle specific pattern issues
+        for div in tree.xpath('//div[@id]'):
+            if NOISE_ID_RE.search(div.get('id')):
+                _drop(div)
+            
+        # Keep header elements that might contain article titles
+        for div in tree.xpath('//div[@id]'):
+            if HEADER_ID_RE.search(div.get('id')):
                 # Only remove if not likely to contain main content
-                header_text = div.get_text()
-                if len(header_text) < 200 or re.search(r'(menu|navigation|logo|sign in)', header_text.lower()):
-                    div.decompose()
-                
-            return str(soup)
-        except Exception:
-            return html_content
+                header_text = div.text_content()
+                if len(header_text) < 200 or HEADER_NAV_RE.search(header_text.lower()):
+                    _drop(div)
 
     def extract(self, url: str, html_content: str) -> Optional[str]:
         if not html_content or len(html_content.strip()) < 100:
             return None
 
-        html_content = self._preprocess_html(html_content)
-        metadata = self.get_article_metadata(html_content, url)
-        soup = BeautifulSoup(html_content, 'html.parser')
+        timings = {}
+        started = time.perf_counter()
+
+        def lap(label):
+            nonlocal started
+            now = time.perf_counter()
+            timings[label] = (now - started) * 1000
+            started = now
+
+        try:
+            document = ParsedDocument(html_content)
+        except (etree.ParserError, ValueError) as e:
+            print(f"[ERROR] Could not parse HTML for {url}: {e}")
+            return None
+        lap('parse')
+        try:
+            self._preprocess_html(document.tree)
+        except Exception as e:
+            print(f"[ERROR] Preprocessing failed: {e}")
+        lap('preprocess')
+        metadata = self.get_article_metadata(document.tree, url)
+        lap('metadata')
 
         cleaned_results = []
 
         # Site-specific selectors (if applicable)
-        site_specific = self._extract_with_selectors(html_content, url)
+        site_specific = self._extract_with_selectors(document, url)
         if site_specific and len(site_specific.strip()) > 500:
             cleaned_results.append((site_specific, 1.2, 'site-specific'))
+        lap('site-specific')
 
         # Trafilatura
-        trafilatura_result = self._extract_trafilatura(html_content)
+        trafilatura_result = self._extract_trafilatura(document)
         if trafilatura_result:
             cleaned_results.append((trafilatura_result, 1.0, 'trafilatura'))
+        lap('trafilatura')
 
         # Readability
         try:
-            doc = Document(html_content)
-            readability_soup = BeautifulSoup(doc.summary(), 'html.parser')
-            readability_text = self._fallback_extract_paragraphs(readability_soup)
+            doc = Document(document.copy_tree())
+            readability_tree = lxml_html.document_fromstring(doc.summary())
+            readability_text = self._fallback_extract_paragraphs(readability_tree)
             if readability_text:
                 cleaned_results.append((readability_text, 0.9, 'readability'))
         except Exception as e:
             print(f"[ERROR] Readability failed: {e}")
+        lap('readability')
 
         # BoilerPy (optional)
         try:
-            boilerpy_result = self._extract_boilerpy(html_content)
+            boilerpy_result = self._extract_boilerpy(document.html)
             if boilerpy_result:
                 cleaned_results.append((boilerpy_result, 0.8, 'boilerpy'))
         except Exception:
             pass
+        lap('boilerpy')
 
+        result = None
         if cleaned_results:
             scored_results = []
-            for content, base_weight, label in cleaned_results:
-                score = self._calculate_content_quality(content)
+            scores = content_quality_batch([content for content, _, _ in cleaned_results])
+            for (content, base_weight, label), score in zip(cleaned_results, scores):
                 length_score = min(len(content) / 5000, 1.0)
                 total_score = base_weight * score * length_score
                 scored_results.append((content, total_score, label))
 
             best_result, _, label = max(scored_results, key=lambda x: x[1])
+            lap('scoring')
             print(f"[DEBUG] Selected content from {label} with length {len(best_result)}")
-            return self._format_with_metadata(self._clean_content(best_result), metadata)
-
-        # Fallback: auto-detect main content div
-        guessed_div = self._guess_main_content_div(soup)
-        if guessed_div:
-            text = guessed_div.get_text(separator=" ", strip=True)
-            if text:
-                return self._format_with_metadata(self._clean_content(text), metadata)
-
-        # Fallback: collect all <p> and <li> elements
-        fallback = self._fallback_extract_paragraphs(soup)
-        if fallback:
-            return self._format_with_metadata(self._clean_content(fallback), metadata)
-
-        return None
-
-    def _extract_with_selectors(self, html_content: str, url: str) -> Optional[str]:
+            result = self._format_with_metadata(self._clean_content(best_result), metadata)
+            lap('cleaning')
+        else:
+            # Fallback: auto-detect main content div
+            guessed_div = self._guess_main_content_div(document.tree)
+            if guessed_div is not None:
+                text = _node_text(guessed_div)
+                if text:
+                    result = self._format_with_metadata(self._clean_content(text), metadata)
+
+            # Fallback: collect all <p> and <li> elements
+            if result is None:
+                fallback = self._fallback_extract_paragraphs(document.tree)
+                if fallback:
+                    result = self._format_with_metadata(self._clean_content(fallback), metadata)
+            lap('fallback')
+
+        self.last_timings = timings
+        print("[DEBUG] Extraction timings (ms): " + ", ".join(f"{k}={v:.1f}" for k, v in timings.items()))
+        return result
+
+    def _extract_with_selectors(self, document: ParsedDocument, url: str) -> Optional[str]:
         """Extract content using custom CSS selectors for known sites."""
-        from urllib.parse import urlparse
-        domain = urlparse(url).netloc
-        config = {}
-
-        for known_domain in self.site_configs:
-            if known_domain in domain:
-                config = self.site_configs[known_domain]
-                break
-
-        selectors = config.get("selectors", [])
-        remove_selectors = config.get("remove_selectors", [])
+        rule = self.site_rules.lookup(url)
+        selectors = rule.selectors if rule is not None else []
+        remove_selectors = rule.remove_selectors if rule is not None else []
 
         if not selectors:
-            selectors = [
-                'article', '.article', '.article-body', '.content', '.entry-content',
-                'div[itemprop="articleBody"]', '.story-body', '.post-content', 'main'
-            ]
+            selectors = DEFAULT_CSS_SELECTORS
 
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            tree = document.copy_tree()
 
             for selector in remove_selectors:
-                for element in soup.select(selector):
-                    element.decompose()
+                for element in selector(tree):
+                    _drop(element)
 
-            for tag in soup.find_all(['aside', 'nav', 'footer']):
-                tag.decompose()
+            for tag in list(tree.iter('aside', 'nav', 'footer')):
+                _drop(tag)
 
-            for tag in soup.find_all(class_=re.compile(r'(ad-|banner|promo|sponsored|recommendation)')):
-                tag.decompose()
+            for tag in tree.xpath('//*[@class]'):
+                if AD_CLASS_RE.search(tag.get('class')):
+                    _drop(tag)
 
             content_parts = []
 
             for selector in selectors:
-                for element in soup.select(selector):
+                for element in selector(tree):
                     self._clean_element(element)
 
                     paragraphs = []
-                    children = list(element.children)
+                    children = [child for child in element if isinstance(child.tag, str)]
                     i = 0
                     while i < len(children):
                         child = children[i]
-                        if not isinstance(child, Tag):
-                            i += 1
-                            continue
-
-                        tag_name = child.name
-                        text = child.get_text(separator=" ", strip=True)
+                        tag_name = child.tag
+                        text = _node_text(child)
 
                         if tag_name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6'] and text:
                             merged_text = [text]
                             j = i + 1
                             while j < len(children):
                                 next_child = children[j]
-                                if isinstance(next_child, Tag) and next_child.name in ['p', 'div', 'ul', 'ol']:
-                                    para = next_child.get_text(separator=" ", strip=True)
+                                if next_child.tag in ['p', 'div', 'ul', 'ol']:
+                                    para = _node_text(next_child)
                                     if para and len(para) > 30 and not self._is_boilerplate(para):
                                         merged_text.append(para)
                                         i = j
@@ -401,8 +305,8 @@ class HTMLContentExtractor:
 
             if not content_parts:
                 paragraphs = []
-                for p in soup.find_all(['p']):
-                    text = p.get_text(separator = " ", strip=True)
+                for p in tree.iter('p'):
+                    text = _node_text(p)
                     if text and len(text) > 20 and not self._is_boilerplate(text):
                         paragraphs.append(text)
                 if paragraphs:
@@ -417,59 +321,39 @@ class HTMLContentExtractor:
     def _clean_element(self, element):
         """Clean an element's internal structure."""
         # Remove common clutter tags
-        for tag in element.find_all(['script', 'style', 'button', 'form', 'input', 'iframe']):
-            tag.decompose()
+        for tag in list(element.iterdescendants('script', 'style', 'button', 'form', 'input', 'iframe')):
+            _drop(tag)
             
         # Remove share buttons and related elements
-        for tag in element.find_all(class_=re.compile(r'share|social|comment|related|promo|ad|subscribe|newsletter')):
-            tag.decompose()
+        for tag in list(element.iterdescendants()):
+            if isinstance(tag.tag, str) and CLUTTER_CLASS_RE.search(tag.get('class', '')):
+                _drop(tag)
             
         # Remove empty paragraphs
-        for p in element.find_all('p'):
-            if not p.get_text(separator = " ", strip=True) or len(p.get_text(separator = " ", strip=True)) < 5:
-                p.decompose()
+        for p in list(element.iterdescendants('p')):
+            if len(_node_text(p)) < 5:
+                _drop(p)
                 
     def _is_boilerplate(self, text: str) -> bool:
         """Check if text is likely boilerplate content."""
-        text_lower = text.lower()
-        
-        # Check against removal keywords
-        if any(keyword in text_lower for keyword in self.removal_keywords):
-            return True
-            
-        # Check for common boilerplate patterns
-        if (len(text) < 20 and 
-            (text.isupper() or 
-             text.count('.') == 0 or 
-             re.search(r'^\d+:\d+$', text) or
-             re.search(r'^[^\w]*https?://', text))):
-            return True
-            
-        return False
-    
+        return self.cleaner.is_boilerplate(text)
 
-    def _extract_trafilatura(self, html_content: str) -> Optional[str]:
+    def _extract_trafilatura(self, document: ParsedDocument) -> Optional[str]:
         try:
-            config = use_config()
-            if not config.has_section("EXTRACTION"):
-                config.add_section("EXTRACTION")
-            config.set("DEFAULT", "EXTRACTION_TIMEOUT", "0")
-            config.set("EXTRACTION", "favor_precision", "true")
-
-            result = trafilatura_extract(html_content, config=config)
+            result = trafilatura_extract(document.copy_tree(), config=self.trafilatura_config)
             return result if result and len(result) > 300 else None
         except Exception as e:
             print(f"[ERROR] Trafilatura failed: {e}")
             return None
         
-    def _guess_main_content_div(self, soup: BeautifulSoup) -> Optional[Tag]:
+    def _guess_main_content_div(self, tree):
         candidates = []
-        for div in soup.find_all('div'):
-            class_attr = ' '.join(div.get('class', []))
+        for div in tree.iter('div'):
+            class_attr = div.get('class', '')
             if any(kw in class_attr for kw in ['footer', 'nav', 'sidebar', 'header', 'promo', 'share']):
                 continue
-            text = div.get_text(separator=' ', strip=True)
-            p_count = len(div.find_all('p'))
+            text = _node_text(div)
+            p_count = sum(1 for _ in div.iterdescendants('p'))
             if len(text) > 500 and p_count >= 3:
                 candidates.append((div, len(text)))
 
@@ -477,10 +361,10 @@ class HTMLContentExtractor:
             return sorted(candidates, key=lambda x: x[1], reverse=True)[0][0]
         return None
     
-    def _fallback_extract_paragraphs(self, soup: BeautifulSoup) -> Optional[str]:
+    def _fallback_extract_paragraphs(self, tree) -> Optional[str]:
         paragraphs = []
-        for tag in soup.find_all(['p', 'li', 'h2', 'h3']):
-            text = tag.get_text(separator=" ", strip=True)
+        for tag in tree.iter('p', 'li', 'h2', 'h3'):
+            text = _node_text(tag)
             if text and len(text) > 40 and not self._is_boilerplate(text):
                 paragraphs.append(text)
         return '\n\n'.join(paragraphs) if paragraphs else None
@@ -502,7 +386,7 @@ class HTMLContentExtractor:
             for tag in soup.find_all(['script', 'style', 'nav', 'footer', 'header', 'aside']):
                 tag.decompose()
                 
-            for tag in soup.find_all(class_=re.compile(r'ads|share|comment|social|promo|related')):
+            for tag in soup.find_all(class_=READABILITY_CLUTTER_RE):
                 tag.decompose()
                 
             # Extract paragraphs with proper spacing, including all possible content containers
@@ -551,73 +435,10 @@ class HTMLContentExtractor:
 
     def _calculate_content_quality(self, content: str) -> float:
         """Calculate a quality score for the content."""
-        if not content:
-            return 0.0
-            
-        # Some quality indicators
-        avg_line_length = sum(len(line) for line in content.splitlines()) / max(1, len(content.splitlines()))
-        sentence_count = content.count('.') + content.count('!') + content.count('?')
-        word_count = len(content.split())
-        
-        # Higher score for content with more sentences and reasonable line lengths
-        quality_score = min(1.0, (sentence_count / max(1, word_count / 20)) * 
-                          (min(avg_line_length, 100) / 100))
-        
-        # Penalize content with too many non-alphanumeric characters
-        alphanumeric_ratio = sum(c.isalnum() or c.isspace() for c in content) / max(1, len(content))
-        quality_score *= max(0.5, alphanumeric_ratio)
-        
-        # Penalize content with too many uppercase characters
-        uppercase_ratio = sum(c.isupper() for c in content) / max(1, len(content) - content.count(' '))
-        if uppercase_ratio > 0.3:
-            quality_score *= 0.8
-            
-        return quality_score
+        return content_quality(content)
 
     def _clean_content(self, content: str) -> str:
-        if not content:
-            return ""
-
-        import html as html_lib
-        content = html_lib.unescape(content)
-
-        # Remove invisible/control characters
-        content = re.sub(r'[\x00-\x1F\x7F]', ' ', content)
-
-        # Fix punctuation spacing issues
-        content = re.sub(r'\s+([.,;!?])', r'\1', content)
-        content = re.sub(r'([.,;!?])(?=\w)', r'\1 ', content)
-
-
-        # Fix joined words
-        content = re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', content)
-        content = re.sub(r'(?<=[a-zA-Z])(?=\d)', ' ', content)
-        content = re.sub(r'(?<=\d)(?=[a-zA-Z])', ' ', content)
-     
-
-        # Normalize spacing
-        content = re.sub(r' {2,}', ' ', content)
-        content = re.sub(r'\n{3,}', '\n\n', content)
-
-
-        for i, pattern in enumerate(self.blacklist_patterns):
-            before = len(content)
-            content = re.sub(pattern, ' ', content, flags=re.IGNORECASE | re.MULTILINE)
-            after = len(content)
-
-        # Deduplication disabled for debug
-        # content = self._deduplicate_content(content, keep_longer=True)
-
-        # Remove heuristic that splits content on sentence boundaries (temporarily)
-        # if content.count('\n') < 3 and len(content) > 1000:
-        #     parts = re.split(r'(?<=[.!?]) +(?=[A-Z])', content)
-        #     content = '\n\n'.join(parts)
-
-        # Final cleanup
-        content = re.sub(r'\n{3,}', '\n\n', content)
-        content = content.strip()
-        
-        return content
+        return self.cleaner.clean(content)
     
     def _deduplicate_content(self, content: str, keep_longer: bool = False) -> str:
         """Only remove exact line duplicates. Avoid using SequenceMatcher."""
@@ -633,86 +454,86 @@ class HTMLContentExtractor:
         
         return '\n\n'.join(result)
 
-    def get_article_metadata(self, html_content: str, url: str) -> Dict:
-        """Extract metadata from the article."""
+    def get_article_metadata(self, document, url: str) -> Dict:
+        """Extract metadata from the article (an HTML string or a parsed lxml tree)."""
         try:
             metadata = {}
-            soup = BeautifulSoup(html_content, 'html.parser')
+            tree = ParsedDocument(document).tree if isinstance(document, str) else document
             
             # Get title
-            metadata['title'] = self._extract_title(soup)
+            metadata['title'] = self._extract_title(tree)
             
             # Get author
-            metadata['author'] = self._extract_author(soup)
+            metadata['author'] = self._extract_author(tree)
             
             # Get publication date
-            metadata['date'] = self._extract_date(soup)
+            metadata['date'] = self._extract_date(tree)
             
             # Get source/publication
-            metadata['source'] = self._extract_source(soup, url)
+            metadata['source'] = self._extract_source(tree, url)
             
             return {k: v for k, v in metadata.items() if v}  # Remove empty values
         except Exception:
             return {}
             
-    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_title(self, tree) -> Optional[str]:
         """Extract the article title."""
         # Try meta tags first
-        for meta in soup.find_all('meta'):
+        for meta in tree.iter('meta'):
             if meta.get('property') in ['og:title', 'twitter:title'] and meta.get('content'):
                 return meta.get('content').strip()
                 
         # Try h1 tags
-        h1 = soup.find('h1')
-        if h1:
-            return h1.get_text(separator = " ", strip=True)
+        h1 = next(tree.iter('h1'), None)
+        if h1 is not None:
+            return _node_text(h1)
             
         # Fallback to title tag
-        title_tag = soup.find('title')
-        if title_tag:
-            return title_tag.get_text(separator = " ", strip=True)
+        title_tag = next(tree.iter('title'), None)
+        if title_tag is not None:
+            return _node_text(title_tag)
             
         return None
         
-    def _extract_author(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_author(self, tree) -> Optional[str]:
         """Extract the author name."""
         # Try meta tags
-        for meta in soup.find_all('meta'):
+        for meta in tree.iter('meta'):
             if meta.get('name') in ['author', 'article:author'] and meta.get('content'):
                 return meta.get('content').strip()
                 
         # Try common author selectors
-        for selector in ['.author', '.byline', '.writer', '[rel="author"]']:
-            author_elem = soup.select_one(selector)
-            if author_elem:
-                return author_elem.get_text(separator = " ", strip=True)
+        for selector in AUTHOR_SELECTORS:
+            matches = selector(tree)
+            if matches:
+                return _node_text(matches[0])
                 
         return None
         
-    def _extract_date(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_date(self, tree) -> Optional[str]:
         """Extract publication date."""
         # Try meta tags
-        for meta in soup.find_all('meta'):
+        for meta in tree.iter('meta'):
             if meta.get('property') in ['article:published_time', 'og:published_time'] and meta.get('content'):
                 return meta.get('content').strip()
                 
         # Try time tags
-        time_elem = soup.find('time')
-        if time_elem and time_elem.get('datetime'):
+        time_elem = next(tree.iter('time'), None)
+        if time_elem is not None and time_elem.get('datetime'):
             return time_elem.get('datetime')
             
         # Try common date selectors
-        for selector in ['.date', '.published', '.timestamp', '.pubdate']:
-            date_elem = soup.select_one(selector)
-            if date_elem:
-                return date_elem.get_text(separator = " ", strip=True)
+        for selector in DATE_SELECTORS:
+            matches = selector(tree)
+            if matches:
+                return _node_text(matches[0])
                 
         return None
         
-    def _extract_source(self, soup: BeautifulSoup, url: str) -> str:
+    def _extract_source(self, tree, url: str) -> str:
         """Extract publication source name."""
         # Try meta tags
-        for meta in soup.find_all('meta'):
+        for meta in tree.iter('meta'):
             if meta.get('property') in ['og:site_name'] and meta.get('content'):
                 return meta.get('content').strip()
                 
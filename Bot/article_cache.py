@@ -0,0 +1,144 @@
+import os
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from disk_cache import DiskCache
+from extraction_result import ExtractionResult
+
+"""
+Disk cache of extracted articles, keyed by canonical URL. The hourly runs and
+questions on related topics keep landing on the same pages; serving them from
+here saves a Bright Data request (and possibly a browser render) plus the
+extraction. The extracted text and its metadata are stored compressed; raw pages
+only when a caller asks to keep them (FastContentExtractor keep_html).
+Entries expire per domain: homepages and news sites change quickly, reference
+pages hardly at all.
+"""
+
+ARTICLE_CACHE_ENABLED = os.getenv("ARTICLE_CACHE_ENABLED", "true").lower() != "false"
+ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL_HOURS", "24")) * 3600
+ARTICLE_CACHE_MAX_BYTES = int(float(os.getenv("ARTICLE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+HOMEPAGE_TTL = 1 * 3600
+
+# TTL in hours by registered domain or suffix; the longest matching suffix wins.
+DOMAIN_TTL_HOURS = {
+    # news: articles get updated and corrected during the first hours
+    "reuters.com": 6,
+    "apnews.com": 6,
+    "bloomberg.com": 6,
+    "cnn.com": 6,
+    "bbc.com": 6,
+    "bbc.co.uk": 6,
+    "nytimes.com": 6,
+    "theguardian.com": 6,
+    "washingtonpost.com": 6,
+    "news.google.com": 1,
+    # reference: slow-moving
+    "wikipedia.org": 7 * 24,
+    "britannica.com": 30 * 24,
+    "arxiv.org": 30 * 24,
+    "gov": 3 * 24,
+    "edu": 7 * 24,
+    "int": 3 * 24,
+}
+
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid", "ocid", "smid"}
+
+_cache: Optional[DiskCache] = None
+
+
+def get_article_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache("articles", max_bytes=ARTICLE_CACHE_MAX_BYTES, compress=True)
+    return _cache
+
+
+def close_article_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+
+def canonical_url(url: str) -> str:
+    """
+    Lowercases scheme and host, drops "www.", default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the query string.
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    if scheme == "http":
+        scheme = "https"  # the same page is usually served on both
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def ttl_for_url(url: str) -> float:
+    """Seconds an extracted copy of `url` stays fresh."""
+    parts = urlsplit(canonical_url(url))
+    if parts.path == "/" and not parts.query:
+        return HOMEPAGE_TTL
+    labels = (parts.hostname or "").split(".")
+    for i in range(len(labels)):
+        hours = DOMAIN_TTL_HOURS.get(".".join(labels[i:]))
+        if hours is not None:
+            return hours * 3600
+    return ARTICLE_CACHE_TTL
+
+
+def get_cached_article(url: str) -> Optional[ExtractionResult]:
+    """Returns a fresh cached extraction result for `url`."""
+    if not ARTICLE_CACHE_ENABLED:
+        return None
+    entry = get_article_cache().get_json(canonical_url(url))
+    if entry is None:
+        return None
+    return ExtractionResult(
+        url,
+        content=entry["content"],
+        success=True,
+        domain=entry["domain"],
+        cached=True,
+        fetched_at=entry["fetched_at"],
+        html_bytes=entry.get("html_bytes", 0),
+        has_html=entry.get("has_html", False),
+    )
+
+
+def store_article(result: ExtractionResult):
+    """Caches a successful extraction result; failures are never stored."""
+    if not ARTICLE_CACHE_ENABLED or not result.success or not result.content:
+        return
+    get_article_cache().set_json(
+        canonical_url(result.url),
+        {
+            "url": result.url,
+            "domain": result.domain,
+            "content": result.content,
+            "fetched_at": result.fetched_at or time.time(),
+            "html_bytes": result.html_bytes,
+            "has_html": result.has_html,
+        },
+        ttl=ttl_for_url(result.url),
+    )
+
+
+def store_html(url: str, html: str):
+    """Spills a raw page to disk so it does not have to stay in memory."""
+    get_article_cache().set(f"html:{canonical_url(url)}", html.encode("utf-8"), ttl=ttl_for_url(url))
+
+
+def get_cached_html(url: str) -> Optional[str]:
+    value = get_article_cache().get(f"html:{canonical_url(url)}")
+    return value.decode("utf-8") if value is not None else None
@@ -0,0 +1,161 @@
+import hashlib
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from search_session import STOP_WORDS
+
+"""
+Lexical ranking of scraped articles before they are summarized or handed to the
+agent. Candidates are scored with BM25 against the search query (plus the question
+title, when there is one), and near-duplicates — syndicated wire stories, the same
+article under two URLs — are dropped via SimHash, so the few summaries we pay for
+go to the most relevant distinct articles.
+"""
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 3  # Hamming distance at or below which two articles are duplicates
+SHINGLE_SIZE = 3
+COVERAGE_THRESHOLD = 0.6  # share of query terms a streamed article needs to be accepted on arrival
+
+WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in WORD_RE.findall(text.lower()) if w not in STOP_WORDS]
+
+
+def bm25_scores(query_tokens: List[str], docs_tokens: List[List[str]]) -> List[float]:
+    """BM25 score of every document against the query, with IDF taken over the candidates."""
+    if not docs_tokens:
+        return []
+    n_docs = len(docs_tokens)
+    avg_len = sum(len(d) for d in docs_tokens) / n_docs or 1.0
+    doc_freq = Counter()
+    term_freqs = []
+    for tokens in docs_tokens:
+        counts = Counter(tokens)
+        term_freqs.append(counts)
+        doc_freq.update(counts.keys())
+
+    query_terms = set(query_tokens)
+    idf = {t: math.log(1 + (n_docs - doc_freq[t] + 0.5) / (doc_freq[t] + 0.5)) for t in query_terms}
+    scores = []
+    for tokens, counts in zip(docs_tokens, term_freqs):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avg_len)
+        score = 0.0
+        for t in query_terms:
+            tf = counts.get(t)
+            if tf:
+                score += idf[t] * tf * (BM25_K1 + 1) / (tf + norm)
+        scores.append(score)
+    return scores
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash over word shingles."""
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    counts = Counter(shingles)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big") for sh in counts),
+        dtype=np.uint64,
+        count=len(counts),
+    )
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts)) @ (2 * bits.astype(np.int64) - 1)
+    return sum(1 << int(bit) for bit in np.flatnonzero(weights > 0))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _rank(urls: List[str], docs_tokens: List[List[str]], query_tokens: List[str], limit: Optional[int],
+          kept_hashes: List[int]) -> List[Tuple[str, float]]:
+    scores = bm25_scores(query_tokens, docs_tokens)
+    order = sorted(range(len(urls)), key=lambda i: -scores[i])
+
+    ranked = []
+    for i in order:
+        if limit is not None and len(ranked) >= limit:
+            break
+        fingerprint = simhash(docs_tokens[i])
+        if any(hamming_distance(fingerprint, h) <= SIMHASH_MAX_DISTANCE for h in kept_hashes):
+            print(f"[rank_articles] Dropping near-duplicate article: {urls[i]}")
+            continue
+        kept_hashes.append(fingerprint)
+        ranked.append((urls[i], scores[i]))
+    return ranked
+
+
+def rank_articles(query: str, articles: Dict[str, str], title: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Returns (url, score) for the distinct articles of `articles` ({url: text}),
+    most relevant first; ties keep the input order. An article whose SimHash is
+    within SIMHASH_MAX_DISTANCE of a higher-ranked one is dropped.
+    """
+    urls = list(articles)
+    docs_tokens = [tokenize(articles[url]) for url in urls]
+    query_tokens = tokenize(query if not title else f"{query} {title}")
+    return _rank(urls, docs_tokens, query_tokens, limit, [])
+
+
+class ArticleSelector:
+    """
+    Incremental variant of rank_articles for articles that arrive one at a time.
+    An article covering enough of the query terms is accepted as soon as it is
+    offered, so its summary can start right away; the others are kept aside and
+    ranked with BM25 by remaining() once the stream ends short of `limit`.
+    """
+
+    def __init__(self, query: str, title: Optional[str] = None, limit: int = 3,
+                 coverage_threshold: float = COVERAGE_THRESHOLD):
+        self.query_terms = set(tokenize(query))
+        self.rank_tokens = tokenize(query if not title else f"{query} {title}")
+        self.limit = limit
+        self.coverage_threshold = coverage_threshold
+        self.selected: List[str] = []
+        self._hashes: List[int] = []
+        self._deferred: Dict[str, List[str]] = {}
+
+    @property
+    def done(self) -> bool:
+        return len(self.selected) >= self.limit
+
+    def coverage(self, tokens: List[str]) -> float:
+        if not self.query_terms:
+            return 1.0
+        return len(self.query_terms.intersection(tokens)) / len(self.query_terms)
+
+    def offer(self, url: str, text: str) -> bool:
+        """Returns True if the article is accepted now."""
+        if self.done:
+            return False
+        tokens = tokenize(text)
+        if self.coverage(tokens) < self.coverage_threshold:
+            self._deferred[url] = tokens
+            return False
+        fingerprint = simhash(tokens)
+        if any(hamming_distance(fingerprint, h) <= SIMHASH_MAX_DISTANCE for h in self._hashes):
+            print(f"[rank_articles] Dropping near-duplicate article: {url}")
+            return False
+        self._hashes.append(fingerprint)
+        self.selected.append(url)
+        return True
+
+    def remaining(self) -> List[Tuple[str, float]]:
+        """Best distinct deferred articles to fill the selection up to `limit`."""
+        if self.done or not self._deferred:
+            return []
+        urls = list(self._deferred)
+        ranked = _rank(urls, [self._deferred[u] for u in urls], self.rank_tokens,
+                       self.limit - len(self.selected), self._hashes)
+        self.selected.extend(url for url, _ in ranked)
+        return ranked
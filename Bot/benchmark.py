@@ -4,10 +4,16 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 import dotenv
-import requests
 import os
 from forecaster import binary_forecast, multiple_choice_forecast
-from main import get_post_details
+from metaculus_api import get_post_details, request_json
+from llm_calls import close_openai_client
+from search import close_asknews_client
+from http_session import close_all_sessions, print_connection_stats
+from metrics import print_latency_stats
+from browser import close_browser_pool
+from extraction_pool import shutdown_extraction_pool
+from llm_cache import LLMCacheMiss, set_cache_mode
 
 
 dotenv.load_dotenv()
@@ -16,6 +22,7 @@ OUTPUT_DIR = "new_benchmark"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 USE_CUSTOM_QUESTIONS = True  # Set this to True to use manually-defined non-Metaculus questions
+REPLAY_FROM_CACHE = False  # Set this to True to serve every LLM call from the response cache (no API spend)
 
 class ForecastableQuestion:
     def __init__(self, details: dict, community_prediction = 50.0, url: str = ""):
@@ -79,11 +86,7 @@ async def get_open_binary_questions(limit=400, crowd_forecasters_gte=0):
         "status": "open",
         "type": "binary"
     }
-    response = requests.get(url, params=params)
-    if not response.ok:
-        raise RuntimeError(response.text)
-
-    questions = response.json()["results"]
+    questions = (await request_json("GET", url, params=params, auth=False))["results"]
     all_questions = []
     deadline = datetime(2026, 1, 2)
 
@@ -101,10 +104,7 @@ async def get_open_binary_questions(limit=400, crowd_forecasters_gte=0):
 
 async def get_metaculus_community_prediction(question_id):
     url = f"https://www.metaculus.com/api/posts/{question_id}/"
-    response = requests.get(url)
-    if not response.ok:
-        raise RuntimeError(response.text)
-    data = response.json()
+    data = await request_json("GET", url, auth=False)
     try:
         cp_history = data["question"]["aggregations"]["recency_weighted"]["history"]
         latest_cp = cp_history[-1]
@@ -118,7 +118,7 @@ async def forecast_question(q):
     print(f"[forecast_question] Starting forecast for question: {q.title if hasattr(q, 'title') else q}")
     try:
         if isinstance(q, SimpleQuestion):
-            details_dict = get_post_details(q.post_id)["question"]
+            details_dict = (await get_post_details(q.post_id))["question"]
             community_prob = await get_metaculus_community_prediction(q.id)
             question = ForecastableQuestion(details=details_dict, community_prediction=community_prob, url=q.url)
         else:
@@ -171,111 +171,179 @@ async def forecast_question(q):
         print(f"[forecast_question] Returning result for '{question.title}'")
         return result
 
+    except LLMCacheMiss as e:
+        print(f"[forecast_question] Skipping '{q.title if hasattr(q, 'title') else q}' in replay: {e}")
+        return None
     except Exception as e:
         print(f"[forecast_question] Error forecasting question '{q.title if hasattr(q, 'title') else q}': {e}")
         return None
 
     
 
-def normalized_eval(
-    bot, community, q_type, *,
-    # ── peer‑population parameters ──────────────────────────────
-    n_peers = 100,
-    tau_good = 80,
-    tau_bad  = 20,
-    frac_bad = 0.20,
-    shift_range_binary = 0.17,
-    shift_range_mc     = 0.23,   # base cap; auto‑scaled by k
-    # ── Monte‑Carlo control ────────────────────────────────────
-    n_runs = 1000,                 # << NEW: how many peer-pop draws to average
-    eps = 1e-4,
-    seed = None,
-):
+PEER_SIM_MAX_BYTES = 128 * 1024 * 1024  # memory cap for one block of simulated peer forecasts
+
+
+def dirichlet_batch(rng, alpha):
     """
-    Expected Metaculus PEER score, estimated by averaging `n_runs`
-    independent simulations of a mixture (good+bad) peer population.
+    Draws one Dirichlet sample for every row of `alpha` (shape (..., k)) at once,
+    by normalising independent standard-gamma draws along the last axis.
     """
+    gammas = rng.standard_gamma(alpha)
+    return gammas / gammas.sum(axis=-1, keepdims=True)
 
-    rng = np.random.default_rng(seed)
 
-    # ---------- helpers to draw peers --------------------------------------
-    def _draw_peers_binary(comm_p, size):
-        shift = rng.uniform(-shift_range_binary, shift_range_binary, size=size)
-        mu = np.clip(comm_p + shift, eps, 1 - eps)              # shape (size,)
-
-        n_bad  = int(round(n_peers * frac_bad))
-        n_good = n_peers - n_bad
+def _prepare_eval_inputs(bot, community, q_type, eps):
+    """Clips (and for MC, normalises) one question's bot and community forecasts."""
+    if q_type == "binary":
+        return np.clip(float(bot), eps, 1 - eps), np.clip(float(community), eps, 1 - eps)
 
-        peers_good = rng.beta(mu[:,None] * tau_good,
-                              (1-mu)[:,None] * tau_good,
-                              size=(size, n_good))
-        peers_bad  = rng.beta(mu[:,None] * tau_bad,
-                              (1-mu)[:,None] * tau_bad,
-                              size=(size, n_bad))
+    elif q_type == "multiple_choice":
+        bot_arr  = np.asarray(bot,       dtype=float)
+        comm_arr = np.asarray(community, dtype=float)
 
-        peers = np.concatenate([peers_good, peers_bad], axis=1) # (size, n_peers)
-        return np.clip(peers, eps, 1 - eps)
+        if bot_arr.shape != comm_arr.shape:
+            raise ValueError("bot and community distributions must match length")
 
-    def _draw_peers_mc(comm_arr, size):            # size == n_runs
-        k = len(comm_arr)
-        shift_cap = shift_range_mc / max(1, k / 2)
+        bot_arr  = np.clip(bot_arr,  eps, 1 - eps)
+        comm_arr = np.clip(comm_arr, eps, 1 - eps)
+        comm_arr /= comm_arr.sum()
+        return bot_arr, comm_arr
 
-        # ----- 1. draw shifted means for every run -----------------------------
-        shift = rng.uniform(-shift_cap, shift_cap, size=size)      # (size,)
-        mu_vec = np.clip(comm_arr + shift[:, None], eps, 1 - eps)  # (size, k)
-        mu_vec /= mu_vec.sum(axis=1, keepdims=True)
+    else:
+        raise ValueError("q_type must be 'binary' or 'multiple_choice'")
 
-        # ----- 2. allocate arrays ----------------------------------------------
-        peers = np.empty((size, n_peers, k), dtype=float)
-        n_bad  = int(round(n_peers * frac_bad))
-        n_good = n_peers - n_bad
 
-        # ----- 3. draw good & bad peers run‑by‑run ------------------------------
-        for i in range(size):
-            good = rng.dirichlet(mu_vec[i] * tau_good, size=n_good)
-            bad  = rng.dirichlet(mu_vec[i] * tau_bad,  size=n_bad)
-            peers[i, :n_good]     = good
-            peers[i, n_good:]     = bad
+def _binary_expected_scores(bot_p, comm_p, rng, *, n_peers, tau_good, tau_bad, frac_bad,
+                            shift_range_binary, n_runs, eps, max_bytes):
+    """Expected peer scores for q binary questions; bot_p and comm_p have shape (q,)."""
+    n_bad  = int(round(n_peers * frac_bad))
+    n_good = n_peers - n_bad
+    per_question = 3 * n_runs * n_peers * 8      # peers, log(peers), log(1 - peers)
+    q_chunk = max(1, max_bytes // per_question)
 
-        return np.clip(peers, eps, 1 - eps)         # shape (n_runs, n_peers, k)
+    scores = np.empty(len(bot_p))
+    for start in range(0, len(bot_p), q_chunk):
+        bot_c  = bot_p[start:start + q_chunk, None]                 # (q, 1)
+        comm_c = comm_p[start:start + q_chunk, None]
+        shift = rng.uniform(-shift_range_binary, shift_range_binary, size=(len(comm_c), n_runs))
+        mu = np.clip(comm_c + shift, eps, 1 - eps)[..., None]        # (q, n_runs, 1)
 
-    # ---------- expected score, averaged over n_runs -----------------------
-    if q_type == "binary":
-        bot_p  = np.clip(float(bot), eps, 1 - eps)
-        comm_p = np.clip(float(community), eps, 1 - eps)
+        peers_good = rng.beta(mu * tau_good, (1 - mu) * tau_good, size=(len(comm_c), n_runs, n_good))
+        peers_bad  = rng.beta(mu * tau_bad,  (1 - mu) * tau_bad,  size=(len(comm_c), n_runs, n_bad))
+        peer_p = np.clip(np.concatenate([peers_good, peers_bad], axis=2), eps, 1 - eps)
 
-        peer_p = _draw_peers_binary(comm_p, n_runs)             # (n_runs, n_peers)
+        ln_gm_yes = np.log(peer_p).mean(axis=2)                      # (q, n_runs)
+        ln_gm_no  = np.log(1 - peer_p).mean(axis=2)
 
-        ln_gm_yes = np.log(peer_p).mean(axis=1)                 # (n_runs,)
-        ln_gm_no  = np.log(1 - peer_p).mean(axis=1)
+        ps_yes = 100 * (np.log(bot_c)     - ln_gm_yes)
+        ps_no  = 100 * (np.log(1 - bot_c) - ln_gm_no)
+        scores[start:start + q_chunk] = (comm_c * ps_yes + (1 - comm_c) * ps_no).mean(axis=1)
+    return scores
 
-        ps_yes = 100 * (np.log(bot_p)     - ln_gm_yes)
-        ps_no  = 100 * (np.log(1 - bot_p) - ln_gm_no)
-        scores = comm_p * ps_yes + (1 - comm_p) * ps_no         # (n_runs,)
 
-        return float(scores.mean())
+def _mc_expected_scores(bot_arr, comm_arr, rng, *, n_peers, tau_good, tau_bad, frac_bad,
+                        shift_range_mc, n_runs, eps, max_bytes):
+    """
+    Expected peer scores for q multiple-choice questions with the same number of
+    options k; bot_arr and comm_arr have shape (q, k). Peers are simulated in blocks
+    of runs so the (q, runs, n_peers, k) tensor never exceeds `max_bytes`.
+    """
+    q, k = comm_arr.shape
+    shift_cap = shift_range_mc / max(1, k / 2)
+    n_bad  = int(round(n_peers * frac_bad))
+    n_good = n_peers - n_bad
+
+    # ----- 1. draw shifted means for every run -----------------------------
+    shift = rng.uniform(-shift_cap, shift_cap, size=(q, n_runs))          # (q, n_runs)
+    mu_vec = np.clip(comm_arr[:, None, :] + shift[..., None], eps, 1 - eps)  # (q, n_runs, k)
+    mu_vec /= mu_vec.sum(axis=2, keepdims=True)
+
+    # ----- 2. per-peer concentration: good peers first, then bad ones --------
+    tau = np.concatenate([np.full(n_good, float(tau_good)), np.full(n_bad, float(tau_bad))])
+
+    # ----- 3. draw all peers of a block of runs at once ----------------------
+    per_run = 3 * q * n_peers * k * 8                # alpha, gamma draws, peers
+    runs_chunk = max(1, max_bytes // per_run)
+    ln_gm = np.empty((q, n_runs, k))
+    for start in range(0, n_runs, runs_chunk):
+        mu = mu_vec[:, start:start + runs_chunk]                          # (q, r, k)
+        alpha = mu[:, :, None, :] * tau[None, None, :, None]             # (q, r, n_peers, k)
+        peers = np.clip(dirichlet_batch(rng, alpha), eps, 1 - eps)
+        ln_gm[:, start:start + runs_chunk] = np.log(peers).mean(axis=2)
+
+    peer_scores_each = 100 * (np.log(bot_arr)[:, None, :] - ln_gm)       # (q, n_runs, k)
+    scores = np.einsum("qrk,qk->qr", peer_scores_each, comm_arr)         # (q, n_runs)
+    return scores.mean(axis=1)
+
+
+def normalized_eval_batch(
+    bots, communities, q_types, *,
+    # ── peer‑population parameters ──────────────────────────────
+    n_peers = 100,
+    tau_good = 80,
+    tau_bad  = 20,
+    frac_bad = 0.20,
+    shift_range_binary = 0.17,
+    shift_range_mc     = 0.23,   # base cap; auto‑scaled by k
+    # ── Monte‑Carlo control ────────────────────────────────────
+    n_runs = 1000,
+    eps = 1e-4,
+    seed = None,
+    max_bytes = PEER_SIM_MAX_BYTES,
+    errors = None,
+):
+    """
+    normalized_eval for a whole benchmark in one call. Binary questions are simulated
+    together, and multiple-choice questions together per number of options.
 
-    elif q_type == "multiple_choice":
-        bot_arr  = np.asarray(bot,       dtype=float)
-        comm_arr = np.asarray(community, dtype=float)
+    Returns an array of expected peer scores. If `errors` is a list, a question whose
+    inputs are invalid scores NaN and (index, exception) is appended to it; otherwise
+    the error is raised.
+    """
+    rng = np.random.default_rng(seed)
+    sim = dict(n_peers=n_peers, tau_good=tau_good, tau_bad=tau_bad, frac_bad=frac_bad,
+               n_runs=n_runs, eps=eps, max_bytes=max_bytes)
 
-        if bot_arr.shape != comm_arr.shape:
-            raise ValueError("bot and community distributions must match length")
+    scores = np.full(len(q_types), np.nan)
+    binary_rows, mc_rows = [], {}
+    prepared = {}
+    for i, (bot, community, q_type) in enumerate(zip(bots, communities, q_types)):
+        try:
+            prepared[i] = _prepare_eval_inputs(bot, community, q_type, eps)
+        except Exception as e:
+            if errors is None:
+                raise
+            errors.append((i, e))
+            continue
+        if q_type == "binary":
+            binary_rows.append(i)
+        else:
+            mc_rows.setdefault(len(prepared[i][1]), []).append(i)
 
-        bot_arr  = np.clip(bot_arr,  eps, 1 - eps)
-        comm_arr = np.clip(comm_arr, eps, 1 - eps)
-        comm_arr /= comm_arr.sum()
+    if binary_rows:
+        bot_p  = np.array([prepared[i][0] for i in binary_rows])
+        comm_p = np.array([prepared[i][1] for i in binary_rows])
+        scores[binary_rows] = _binary_expected_scores(
+            bot_p, comm_p, rng, shift_range_binary=shift_range_binary, **sim
+        )
 
-        peer_mat = _draw_peers_mc(comm_arr, n_runs)             # (n_runs, n_peers, k)
-        ln_gm    = np.log(peer_mat).mean(axis=1)                # (n_runs, k)
+    for rows in mc_rows.values():
+        bot_arr  = np.stack([prepared[i][0] for i in rows])
+        comm_arr = np.stack([prepared[i][1] for i in rows])
+        scores[rows] = _mc_expected_scores(
+            bot_arr, comm_arr, rng, shift_range_mc=shift_range_mc, **sim
+        )
 
-        peer_scores_each = 100 * (np.log(bot_arr) - ln_gm)      # (n_runs, k)
-        scores = peer_scores_each @ comm_arr                    # (n_runs,)
+    return scores
 
-        return float(scores.mean())
 
-    else:
-        raise ValueError("q_type must be 'binary' or 'multiple_choice'")
+def normalized_eval(bot, community, q_type, **kwargs):
+    """
+    Expected Metaculus PEER score, estimated by averaging `n_runs`
+    independent simulations of a mixture (good+bad) peer population.
+    Accepts the same keyword arguments as normalized_eval_batch.
+    """
+    return float(normalized_eval_batch([bot], [community], [q_type], **kwargs)[0])
 
 def plot_results(bot_preds, community_preds, question_titles, types, options_list=None):
     binary_indices = [i for i, t in enumerate(types) if t == "binary"]
@@ -313,15 +381,12 @@ def plot_results(bot_preds, community_preds, question_titles, types, options_lis
         plt.show()
 
 def summarize_performance(bot_preds, community_preds, df):
-    normalized_errors = []
-
-    for i, row in df.iterrows():
-        try:
-            err = normalized_eval(row['bot'], row['community'], row['type'])
-            normalized_errors.append(err)
-        except Exception as e:
-            print(f"Error computing score for question '{row['title']}': {e}")
-            normalized_errors.append(np.nan)
+    score_errors = []
+    normalized_errors = normalized_eval_batch(
+        df['bot'].tolist(), df['community'].tolist(), df['type'].tolist(), errors=score_errors
+    )
+    for i, e in score_errors:
+        print(f"Error computing score for question '{df['title'].iloc[i]}': {e}")
 
     df["normalized_error"] = normalized_errors
     df_clean = df.dropna(subset=["normalized_error"])
@@ -349,14 +414,25 @@ def summarize_performance(bot_preds, community_preds, df):
     plt.show()
 
 async def run_benchmark(n=45):
+    if REPLAY_FROM_CACHE:
+        set_cache_mode("replay")
     all_questions = await (get_custom_questions() if USE_CUSTOM_QUESTIONS else get_open_binary_questions(limit=900, crowd_forecasters_gte=30))
     selected_questions = all_questions[:n]
     print(f"Selected {len(selected_questions)} questions")
     results = []
-    for i in range(0, len(selected_questions), 2):
-        batch = selected_questions[i:i+2]
-        batch_results = await asyncio.gather(*(forecast_question(q) for q in batch))
-        results.extend([r for r in batch_results if r is not None])
+    try:
+        for i in range(0, len(selected_questions), 2):
+            batch = selected_questions[i:i+2]
+            batch_results = await asyncio.gather(*(forecast_question(q) for q in batch))
+            results.extend([r for r in batch_results if r is not None])
+    finally:
+        await close_openai_client()
+        await close_asknews_client()
+        await close_all_sessions()
+        await close_browser_pool()
+        shutdown_extraction_pool()
+        print_connection_stats()
+        print_latency_stats()
 
 
     df = pd.DataFrame(results)
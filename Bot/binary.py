@@ -10,6 +10,8 @@ from prompts import (
 )
 from llm_calls import call_claude, call_gpt_o3, call_gpt_o4_mini
 from search import process_search_queries
+from search_session import SearchSession
+from rate_limiter import PRIORITY_HIGH, request_priority
 
 """
 Program flow:
@@ -23,7 +25,7 @@ Program flow:
     (c) The output of forecaster_id 3 is appended to context[2]
     (d) The output of forecaster_id 4 is appended to context[4]
     (e) The output of forecaster_id 5 is appended to context[5]
-6. Now, take binary prompt 2, format in the title, date, resolution_criteria, fine_print and respective context (i.e., forecaster x gets context[x]) and run, simultaneously, all five instances we ran previously
+6. Now, take binary prompt 2, format in the title, date, resolution_criteria, fine_print and respective context (i.e., forecaster x gets context[x]) and run all five instances we ran previously. Each one starts as soon as the step 1 output it depends on is ready (step 1 itself starts once the historical context is available)
 7. Pass the output of all five instances to extract_probability_from_response_as_percentage_not_decimal to extract the five probabilities
 8. Average the five probabilities, first four with weight 1 and last (from o3) with weight 2 to get the final probability
 9. The output should be the final probabilities and the final outputs of binary prompt 2, clearly indicating which output belongs to which forecaster
@@ -55,21 +57,23 @@ async def get_binary_forecast(question_details, write=print):
         )
         return content, await call_gpt_o3(content)
 
-    historical_task = asyncio.create_task(format_and_call_gpt(BINARY_PROMPT_historical))
-    current_task = asyncio.create_task(format_and_call_gpt(BINARY_PROMPT_current))
-    (historical_prompt, historical_output), (current_prompt, current_output) = await asyncio.gather(
-        historical_task, current_task
-    )
+    # Shared by both context searches so overlapping queries, scrapes and summaries run once.
+    search_session = SearchSession()
 
-    context_historical, context_current = await asyncio.gather(
-        process_search_queries(historical_output, forecaster_id="-1", question_details=question_details),
-        process_search_queries(current_output, forecaster_id="0", question_details=question_details),
-    )
+    async def gather_context(prompt_template, forecaster_id, label):
+        _, output = await format_and_call_gpt(prompt_template)
+        write(f"\n{label} context LLM output:\n" + output)
+        context = await process_search_queries(
+            output, forecaster_id=forecaster_id, question_details=question_details, search_session=search_session
+        )
+        write(f"\n{label} context search results:\n" + context)
+        return context
+
+    historical_task = asyncio.create_task(gather_context(BINARY_PROMPT_historical, "-1", "Historical"))
+    current_task = asyncio.create_task(gather_context(BINARY_PROMPT_current, "0", "Current"))
 
-    write("\nHistorical context LLM output:\n" + historical_output)
-    write("\nCurrent context LLM output:\n" + current_output)
-    write("\nHistorical context search results:\n" + context_historical)
-    write("\nCurrent context search results:\n" + context_current)
+    # Step 1 only needs the historical context, so it starts while current search is still running.
+    context_historical = await historical_task
 
     prompt1 = BINARY_PROMPT_1.format(
         title=title,
@@ -79,47 +83,42 @@ async def get_binary_forecast(question_details, write=print):
         context=context_historical,
     )
 
-    async def run_prompt1():
-        return await asyncio.gather(
-            call_claude(prompt1),      # forecaster 1
-            call_claude(prompt1),      # forecaster 2
-            call_gpt_o4_mini(prompt1), # forecaster 3
-            call_gpt_o3(prompt1), # forecaster 4
-            call_gpt_o3(prompt1),      # forecaster 5
-        )
-
-    results_prompt1 = await run_prompt1()
-
-    for i, res in enumerate(results_prompt1):
-        write(f"\nForecaster_{i+1} step 1 output:\n{res}")
+    step1_tasks = [
+        asyncio.create_task(call_claude(prompt1, sample_index=0)),      # forecaster 1
+        asyncio.create_task(call_claude(prompt1, sample_index=1)),      # forecaster 2
+        asyncio.create_task(call_gpt_o4_mini(prompt1)), # forecaster 3
+        asyncio.create_task(call_gpt_o3(prompt1, sample_index=0)), # forecaster 4
+        asyncio.create_task(call_gpt_o3(prompt1, sample_index=1)),      # forecaster 5
+    ]
 
+    # Step-2 forecaster -> (step-1 output it builds on, label, model call)
     context_map = {
-        "1": f"Current context: {context_current}\nOutside view prediction: {results_prompt1[0]}",
-        "2": f"Current context: {context_current}\nOutside view prediction: {results_prompt1[2]}",
-        "3": f"Current context: {context_current}\nOutside view prediction: {results_prompt1[1]}",
-        "4": f"Current context: {context_current}\nInside view prediction: {results_prompt1[3]}",
-        "5": f"Current context: {context_current}\nInside view prediction: {results_prompt1[4]}",
+        "1": (0, "Outside view prediction", call_claude),
+        "2": (2, "Outside view prediction", call_claude),
+        "3": (1, "Outside view prediction", call_gpt_o4_mini),
+        "4": (3, "Inside view prediction", call_gpt_o3),
+        "5": (4, "Inside view prediction", call_gpt_o3),
     }
 
-    def format_prompt2(f_id: str):
+    def format_prompt2(context: str):
         return BINARY_PROMPT_2.format(
             title=title,
             today=today,
             resolution_criteria=resolution_criteria,
             fine_print=fine_print,
-            context=context_map[f_id],
+            context=context,
         )
 
-    async def run_prompt2():
-        return await asyncio.gather(
-            call_claude(format_prompt2("1")),
-            call_claude(format_prompt2("2")),
-            call_gpt_o4_mini(format_prompt2("3")),
-            call_gpt_o3(format_prompt2("4")),
-            call_gpt_o3(format_prompt2("5")),
-        )
+    async def run_forecaster(f_id: str):
+        # Each step-2 call starts as soon as its own step-1 dependency is ready.
+        step1_index, label, call = context_map[f_id]
+        step1_output = await step1_tasks[step1_index]
+        write(f"\nForecaster_{step1_index+1} step 1 output:\n{step1_output}")
+        context_current = await current_task
+        with request_priority(PRIORITY_HIGH):
+            return await call(format_prompt2(f"Current context: {context_current}\n{label}: {step1_output}"))
 
-    results_prompt2 = await run_prompt2()
+    results_prompt2 = await asyncio.gather(*(run_forecaster(f_id) for f_id in context_map))
 
     probabilities = []
     for r in results_prompt2:
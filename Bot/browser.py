@@ -1,43 +1,168 @@
-
-import time
-from patchright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+import asyncio
+import os
+from typing import List, Optional
+from patchright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from HTMLContentExtractor import HTMLContentExtractor
 
-def fetch_full_html(url: str, timeout: int = 60000, headless: bool = True) -> str:
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/113.0.0.0 Safari/537.36"
+)
+
+# Resolves once the DOM has seen no mutations for `quietMs`, or after `maxMs` at the latest.
+WAIT_FOR_DOM_STABLE_JS = """
+([quietMs, maxMs]) => new Promise((resolve) => {
+    let quietTimer = null;
+    let deadline = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(done, quietMs);
+    });
+    function done() {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve();
+    }
+    observer.observe(document, {childList: true, subtree: true, characterData: true});
+    quietTimer = setTimeout(done, quietMs);
+    deadline = setTimeout(done, maxMs);
+})
+"""
+
+
+class BrowserPool:
     """
-    Launches a headless Chromium browser, navigates to `url`,
-    waits for the network to be idle, and returns the rendered HTML.
+    A single long-lived headless Chromium with at most `max_contexts` browser contexts.
+    Pages are handed back to the pool after each fetch and reused, and a context is
+    recycled after `max_uses` fetches to keep memory bounded.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        ctx = browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/113.0.0.0 Safari/537.36"
-            ),
+
+    def __init__(self, max_contexts: int = BROWSER_POOL_SIZE, headless: bool = True, max_uses: int = 25):
+        self.max_contexts = max_contexts
+        self.headless = headless
+        self.max_uses = max_uses
+        self._playwright = None
+        self._browser = None
+        self._idle_pages: List = []
+        self._uses = {}
+        self._slots = asyncio.Semaphore(max_contexts)
+        self._start_lock = asyncio.Lock()
+
+    async def _ensure_started(self):
+        async with self._start_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                # Chromium crashed; drop its pages and relaunch
+                self._idle_pages = []
+                self._uses = {}
+                self._browser = None
+            if self._browser is None:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+
+    async def _new_page(self):
+        ctx = await self._browser.new_context(
+            user_agent=USER_AGENT,
             viewport={"width": 1920, "height": 1080},
             java_script_enabled=True,
         )
-        page = ctx.new_page()
-        page.set_default_navigation_timeout(timeout)
+        page = await ctx.new_page()
+        self._uses[page] = 0
+        return page
+
+    async def _discard_page(self, page):
+        self._uses.pop(page, None)
         try:
-            # Navigate and wait until network is idle (no more than 0.5s of outstanding requests)
-            page.goto(url, wait_until="networkidle")
-            # Extra buffer for late JS-rendered changes 
-            time.sleep(5)
-            return page.content()
-        except PlaywrightTimeoutError:
-            # On timeout, return whatever has loaded so far
-            return page.content()
-        finally:
-            browser.close()
+            await page.context.close()
+        except Exception:
+            pass
+
+    async def fetch(self, url: str, timeout: int = 60000, quiet_ms: int = 500, max_render_wait_ms: int = 5000) -> str:
+        """
+        Navigates to `url` and returns the rendered HTML as soon as the DOM has been
+        stable for `quiet_ms` (instead of waiting for network idle plus a fixed sleep).
+        """
+        await self._ensure_started()
+        async with self._slots:
+            page = self._idle_pages.pop() if self._idle_pages else await self._new_page()
+            healthy = True
+            try:
+                page.set_default_navigation_timeout(timeout)
+                try:
+                    await page.goto(url, wait_until="domcontentloaded")
+                except PlaywrightTimeoutError:
+                    # On timeout, return whatever has loaded so far
+                    pass
+                try:
+                    await page.evaluate(WAIT_FOR_DOM_STABLE_JS, [quiet_ms, max_render_wait_ms])
+                except Exception:
+                    # A client-side redirect destroys the execution context mid-wait
+                    pass
+                return await page.content()
+            except BaseException:
+                # Includes cancellation: the page may still be navigating or running
+                # the DOM-stable script, so it must not go back to the idle pool
+                healthy = False
+                raise
+            finally:
+                self._uses[page] = self._uses.get(page, 0) + 1
+                if healthy and self._uses[page] < self.max_uses and self._browser is not None:
+                    self._idle_pages.append(page)
+                else:
+                    await self._discard_page(page)
+
+    async def close(self):
+        pages, self._idle_pages = self._idle_pages, []
+        for page in pages:
+            await self._discard_page(page)
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+
+async def close_browser_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def fetch_full_html(url: str, timeout: int = 60000) -> str:
+    """
+    Returns the rendered HTML of `url` using the shared browser pool.
+    """
+    return await get_browser_pool().fetch(url, timeout=timeout)
+
 
 if __name__ == "__main__":
     URL = "https://www.gjopen.com/questions/4349-before-1-january-2026-will-the-us-senate-pass-reconciliation-legislation-that-includes-a-moratorium-on-state-and-local-enforcement-of-regulations-regarding-artificial-intelligence"
-    html = fetch_full_html(URL)
-    extractor = HTMLContentExtractor()
-    result = extractor.extract(URL, html)
-    print(html)
-    print("Markdown: ")
-    print(result)
\ No newline at end of file
+
+    async def main():
+        try:
+            html = await fetch_full_html(URL)
+        finally:
+            await close_browser_pool()
+        extractor = HTMLContentExtractor()
+        result = extractor.extract(URL, html)
+        print(html)
+        print("Markdown: ")
+        print(result)
+
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import html as html_lib
+import re
+from typing import Iterable
+
+"""
+Compiled text-cleaning engine used by HTMLContentExtractor. Every pattern is
+compiled once per extractor, and each blacklist pattern is guarded by the literal
+text it cannot match without, checked with one substring search over the casefolded
+article, so an article only pays a regex pass for the boilerplate it actually has.
+"""
+
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x1F\x7F]')
+SPACE_BEFORE_PUNCT_RE = re.compile(r'\s+([.,;!?])')
+PUNCT_BEFORE_WORD_RE = re.compile(r'([.,;!?])(?=\w)')
+# One pass for the lower→Upper, letter→digit and digit→letter boundaries; each match
+# consumes only the character before the boundary, so the spaces inserted are the same
+# as with three lookbehind passes
+JOINED_WORDS_RE = re.compile(r'[a-z](?=[A-Z\d])|[A-Z](?=\d)|\d(?=[a-zA-Z])')
+MULTI_SPACE_RE = re.compile(r' {2,}')
+MULTI_NEWLINE_RE = re.compile(r'\n{3,}')
+
+CLOCK_RE = re.compile(r'^\d+:\d+$')
+LEADING_URL_RE = re.compile(r'^[^\w]*https?://')
+
+
+def required_literal(pattern: str) -> str:
+    """
+    Longest run of plain characters outside any group or class that every match of
+    `pattern` must contain, or "" when there is none (e.g. a top-level alternation).
+    """
+    best = run = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            best, run = max(best, run, key=len), ""
+            i += 2
+            continue
+        if char == '[':
+            best, run = max(best, run, key=len), ""
+            i = pattern.find(']', i + 2)  # a ']' right after '[' is part of the class
+            if i < 0:
+                return ""
+        elif char == '(':
+            best, run = max(best, run, key=len), ""
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return ""
+        elif char in '?*{':
+            run = run[:-1]  # the quantified character is optional
+            best, run = max(best, run, key=len), ""
+            if char == '{':
+                i = pattern.find('}', i)
+                if i < 0:
+                    return ""
+        elif char in '.^$+}':
+            best, run = max(best, run, key=len), ""
+        elif depth == 0:
+            run += char
+        i += 1
+    return max(best, run, key=len)
+
+
+class ContentCleaner:
+    def __init__(self, blacklist_patterns: Iterable[str], removal_keywords: Iterable[str]):
+        # (literal, regex) in configuration order; patterns still run one after the
+        # other, only the ones whose literal is absent are skipped
+        self.blacklist = [
+            (required_literal(pattern).casefold(), re.compile(pattern, re.IGNORECASE | re.MULTILINE))
+            for pattern in blacklist_patterns
+        ]
+        removal_keywords = list(removal_keywords)
+        self.keywords_re = re.compile(
+            "|".join(re.escape(keyword) for keyword in removal_keywords)
+        ) if removal_keywords else None
+
+    def clean(self, content: str) -> str:
+        if not content:
+            return ""
+
+        content = html_lib.unescape(content)
+
+        # Remove invisible/control characters
+        content = CONTROL_CHARS_RE.sub(' ', content)
+
+        # Fix punctuation spacing issues
+        content = SPACE_BEFORE_PUNCT_RE.sub(r'\1', content)
+        content = PUNCT_BEFORE_WORD_RE.sub(r'\1 ', content)
+
+        # Fix joined words
+        content = JOINED_WORDS_RE.sub(r'\g<0> ', content)
+
+        # Normalize spacing
+        content = MULTI_SPACE_RE.sub(' ', content)
+        content = MULTI_NEWLINE_RE.sub('\n\n', content)
+
+        folded = content.casefold()
+        for literal, pattern in self.blacklist:
+            if literal and literal not in folded:
+                continue
+            content, count = pattern.subn(' ', content)
+            if count:
+                folded = content.casefold()
+
+        # Final cleanup
+        content = MULTI_NEWLINE_RE.sub('\n\n', content)
+        return content.strip()
+
+    def is_boilerplate(self, text: str) -> bool:
+        """Check if text is likely boilerplate content."""
+        if self.keywords_re is not None and self.keywords_re.search(text.lower()):
+            return True
+
+        # Check for common boilerplate patterns
+        return bool(
+            len(text) < 20 and
+            (text.isupper() or
+             text.count('.') == 0 or
+             CLOCK_RE.search(text) or
+             LEADING_URL_RE.search(text))
+        )
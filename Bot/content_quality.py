@@ -0,0 +1,132 @@
+from typing import List, Sequence
+import numpy as np
+
+"""
+Content quality score used to rank extraction candidates. Each candidate is mapped
+to one class byte per character — a bytes.translate for ASCII text, a memoized
+lookup per distinct code point otherwise — and every feature of the score is then
+counted with NumPy over those bytes. A batch of candidates shares one class array,
+so ranking the outputs of all extraction strategies is a single scoring call.
+"""
+
+# Character classes
+OTHER = 0
+ALNUM = 1          # alphanumeric, not uppercase
+UPPER_ALNUM = 2
+UPPER_OTHER = 3    # uppercase but not alphanumeric, e.g. Ⓐ
+SPACE = 4          # ' ' only
+WHITESPACE = 5     # other whitespace that does not break lines
+LINE_BREAK = 6     # line boundaries of str.splitlines other than \r and \n
+CR = 7
+LF = 8
+SENTENCE_END = 9   # . ! ?
+
+ALNUM_OR_SPACE = [ALNUM, UPPER_ALNUM, SPACE, WHITESPACE, LINE_BREAK, CR, LF]
+UPPERCASE = [UPPER_ALNUM, UPPER_OTHER]
+BREAKS = [LINE_BREAK, CR, LF]
+IS_WHITESPACE = np.zeros(10, dtype=bool)
+IS_WHITESPACE[[SPACE, WHITESPACE, LINE_BREAK, CR, LF]] = True
+LINE_BOUNDARIES = frozenset('\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029')
+
+
+class _ClassTable(dict):
+    """Code point -> character class, filled on first use."""
+
+    def __missing__(self, codepoint: int) -> int:
+        char = chr(codepoint)
+        if char == '\r':
+            cls = CR
+        elif char == '\n':
+            cls = LF
+        elif char in LINE_BOUNDARIES:
+            cls = LINE_BREAK
+        elif char == ' ':
+            cls = SPACE
+        elif char.isspace():
+            cls = WHITESPACE
+        elif char in '.!?':
+            cls = SENTENCE_END
+        elif char.isupper():
+            cls = UPPER_ALNUM if char.isalnum() else UPPER_OTHER
+        elif char.isalnum():
+            cls = ALNUM
+        else:
+            cls = OTHER
+        self[codepoint] = cls
+        return cls
+
+
+_CLASS_TABLE = _ClassTable()
+ASCII_CLASSES = bytes(_CLASS_TABLE[codepoint] for codepoint in range(128)) + bytes(128)
+
+
+def char_classes(content: str) -> np.ndarray:
+    if content.isascii():
+        return np.frombuffer(content.encode('ascii').translate(ASCII_CLASSES), dtype=np.uint8)
+    codepoints = np.frombuffer(content.encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+    classes = np.empty(len(codepoints), dtype=np.uint8)
+    ascii_mask = codepoints < 128
+    classes[ascii_mask] = np.frombuffer(ASCII_CLASSES, dtype=np.uint8)[codepoints[ascii_mask]]
+    distinct, inverse = np.unique(codepoints[~ascii_mask], return_inverse=True)
+    lookup = np.array([_CLASS_TABLE[codepoint] for codepoint in distinct.tolist()], dtype=np.uint8)
+    classes[~ascii_mask] = lookup[inverse]
+    return classes
+
+
+def _score(length: int, alnum_or_space: int, uppercase: int, spaces: int, sentences: int,
+           words: int, break_chars: int, crlf: int, ends_with_break: bool) -> float:
+    # Line count and average line length as str.splitlines() would give them
+    line_count = break_chars - crlf + (0 if ends_with_break else 1)
+    avg_line_length = (length - break_chars) / max(1, line_count)
+
+    # Higher score for content with more sentences and reasonable line lengths
+    quality_score = min(1.0, (sentences / max(1, words / 20)) * (min(avg_line_length, 100) / 100))
+
+    # Penalize content with too many non-alphanumeric characters
+    quality_score *= max(0.5, alnum_or_space / max(1, length))
+
+    # Penalize content with too many uppercase characters
+    if uppercase / max(1, length - spaces) > 0.3:
+        quality_score *= 0.8
+    return quality_score
+
+
+def content_quality_batch(contents: Sequence[str]) -> List[float]:
+    """Quality score of every candidate, in order; empty candidates score 0."""
+    scores = [0.0] * len(contents)
+    indices = [i for i, content in enumerate(contents) if content]
+    if not indices:
+        return scores
+
+    classes = np.concatenate([char_classes(contents[i]) for i in indices])
+    bounds = np.cumsum([0] + [len(contents[i]) for i in indices])
+    starts, ends = bounds[:-1], bounds[1:]
+
+    # A word starts at a non-space character preceded by a space or a candidate boundary
+    is_space = IS_WHITESPACE[classes]
+    prev_space = np.empty_like(is_space)
+    prev_space[0] = True
+    prev_space[1:] = is_space[:-1]
+    prev_space[starts] = True
+    words = np.diff(np.searchsorted(np.flatnonzero(~is_space & prev_space), bounds)).tolist()
+    last_classes = classes[ends - 1].tolist()
+
+    for column, i in enumerate(indices):
+        counts = np.bincount(classes[starts[column]:ends[column]], minlength=10).tolist()
+        scores[i] = _score(
+            length=len(contents[i]),
+            alnum_or_space=sum(counts[cls] for cls in ALNUM_OR_SPACE),
+            uppercase=sum(counts[cls] for cls in UPPERCASE),
+            spaces=counts[SPACE],
+            sentences=counts[SENTENCE_END],
+            words=words[column],
+            break_chars=sum(counts[cls] for cls in BREAKS),
+            crlf=contents[i].count('\r\n'),
+            ends_with_break=last_classes[column] in BREAKS,
+        )
+    return scores
+
+
+def content_quality(content: str) -> float:
+    """Calculate a quality score for the content."""
+    return content_quality_batch([content])[0]
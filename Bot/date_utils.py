@@ -0,0 +1,84 @@
+import datetime
+import functools
+import re
+from typing import Optional
+import dateparser
+from dateutil.relativedelta import relativedelta
+
+"""
+Fast date normalization for search results. Serper dates are almost always either
+relative ("3 days ago") or in a handful of fixed formats, which compiled regexes
+and strptime handle in microseconds; only the remaining strings go to dateparser,
+whose results are memoized.
+"""
+
+RELATIVE_RE = re.compile(
+    r"^(?P<count>\d+|an?|one)\s+(?P<unit>sec|second|min|minute|hour|hr|day|week|month|year)s?\s+ago$",
+    re.IGNORECASE,
+)
+ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[T ][\d:.]+(?:Z|[+-]\d{2}:?\d{2})?)?$")
+ABSOLUTE_FORMATS = {
+    re.compile(r"^[A-Za-z]{3} \d{1,2}, \d{4}$"): "%b %d, %Y",      # Mar 5, 2024
+    re.compile(r"^[A-Za-z]{4,} \d{1,2}, \d{4}$"): "%B %d, %Y",     # March 5, 2024
+    re.compile(r"^\d{1,2} [A-Za-z]{3} \d{4}$"): "%d %b %Y",        # 5 Mar 2024
+    re.compile(r"^\d{1,2} [A-Za-z]{4,} \d{4}$"): "%d %B %Y",       # 5 March 2024
+    re.compile(r"^\d{1,2}/\d{1,2}/\d{4}$"): "%m/%d/%Y",            # 03/05/2024
+}
+KEYWORD_DAYS = {"just now": 0, "now": 0, "today": 0, "yesterday": 1}
+
+UNIT_DELTAS = {
+    "sec": relativedelta(seconds=1),
+    "second": relativedelta(seconds=1),
+    "min": relativedelta(minutes=1),
+    "minute": relativedelta(minutes=1),
+    "hr": relativedelta(hours=1),
+    "hour": relativedelta(hours=1),
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+    "year": relativedelta(years=1),
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _dateparser_date(text: str, today: datetime.date) -> Optional[datetime.date]:
+    # `today` is part of the cache key because dateparser resolves relative expressions
+    parsed = dateparser.parse(text, settings={'STRICT_PARSING': False})
+    return parsed.date() if parsed else None
+
+
+def parse_date(text: Optional[str], now: Optional[datetime.datetime] = None) -> Optional[datetime.date]:
+    """Returns the calendar date of `text`, or None if it cannot be parsed."""
+    if not text:
+        return None
+    text = text.strip()
+    now = now or datetime.datetime.now()
+
+    match = RELATIVE_RE.match(text)
+    if match:
+        count = match.group("count").lower()
+        count = 1 if count in ("a", "an", "one") else int(count)
+        return (now - UNIT_DELTAS[match.group("unit").lower()] * count).date()
+
+    keyword = KEYWORD_DAYS.get(text.lower())
+    if keyword is not None:
+        return (now - datetime.timedelta(days=keyword)).date()
+
+    if ISO_RE.match(text):
+        try:
+            return datetime.datetime.fromisoformat(text.replace("Z", "+00:00")).date()
+        except ValueError:
+            pass
+
+    for pattern, fmt in ABSOLUTE_FORMATS.items():
+        if pattern.match(text):
+            try:
+                return datetime.datetime.strptime(text, fmt).date()
+            except ValueError:
+                break  # e.g. "Sept 5, 2024": let dateparser try
+
+    return _dateparser_date(text, now.date())
+
+
+def format_date(date: Optional[datetime.date]) -> str:
+    return date.strftime("%b %d, %Y") if date else "Unknown"
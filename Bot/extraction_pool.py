@@ -0,0 +1,87 @@
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from HTMLContentExtractor import HTMLContentExtractor
+
+"""
+Process pool that runs HTMLContentExtractor off the event loop.
+trafilatura, readability and boilerpy3 are CPU-bound, so extracting a large page
+inline stalls every other in-flight search and LLM request. Each worker builds its
+extractor once at startup and is warmed up, so submissions only pay for parsing.
+"""
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+# The pool is created mid-run, when aiohttp, sqlite and the browser driver already
+# have threads; forking then can hand a worker a lock held by a thread that does not
+# exist in the child. Workers start from a clean forkserver (spawn where unavailable).
+EXTRACTION_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+WARMUP_HTML = (
+    "<html><head><title>Warm-up</title></head><body><article>"
+    + "<p>This paragraph only exists to load and warm up the extraction libraries in the worker.</p>" * 20
+    + "</article></body></html>"
+)
+
+_worker_extractor: Optional[HTMLContentExtractor] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_local_extractor: Optional[HTMLContentExtractor] = None
+
+
+def _init_worker():
+    global _worker_extractor
+    _worker_extractor = HTMLContentExtractor()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _worker_extractor.extract("https://warmup.local/", WARMUP_HTML)
+    except Exception:
+        pass
+
+
+def _extract_in_worker(url: str, html: str) -> Optional[str]:
+    return _worker_extractor.extract(url, html)
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context(EXTRACTION_START_METHOD),
+            initializer=_init_worker,
+        )
+    return _pool
+
+
+def _extract_locally(url: str, html: str) -> Optional[str]:
+    global _local_extractor
+    if _local_extractor is None:
+        _local_extractor = HTMLContentExtractor()
+    return _local_extractor.extract(url, html)
+
+
+async def extract_in_pool(url: str, html: str) -> Optional[str]:
+    """
+    Extracts the readable content of `html` in a worker process. If the pool has
+    died (e.g. a worker was OOM-killed) it is dropped and the page is extracted in
+    a thread instead, so a broken pool never fails a search.
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_extraction_pool(), _extract_in_worker, url, html)
+    except BrokenProcessPool:
+        print(f"[extract_in_pool] ⚠️ Extraction pool broke, extracting {url} in a thread")
+        _pool = None
+        return await asyncio.to_thread(_extract_locally, url, html)
+
+
+def shutdown_extraction_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,38 @@
+from typing import Optional
+from urllib.parse import urlparse
+
+"""
+Compact result of extracting one URL. Only the extracted text is kept in memory;
+the raw page (often 1-3 MB for a rendered fallback) is dropped as soon as the text
+is extracted, or spilled to the article cache when the caller asked to keep it
+(has_html; read it back with article_cache.get_cached_html).
+"""
+
+
+class ExtractionResult:
+    __slots__ = ("url", "domain", "content", "error", "success", "html_bytes", "cached", "fetched_at", "has_html")
+
+    def __init__(self, url: str, content: Optional[str] = None, error: Optional[str] = None,
+                 success: bool = False, html_bytes: int = 0, domain: Optional[str] = None,
+                 cached: bool = False, fetched_at: Optional[float] = None, has_html: bool = False):
+        self.url = url
+        self.domain = domain if domain is not None else urlparse(url).netloc
+        self.content = content
+        self.error = error
+        self.success = success
+        self.html_bytes = html_bytes
+        self.cached = cached
+        self.fetched_at = fetched_at
+        self.has_html = has_html
+
+    @classmethod
+    def failed(cls, url: str, error: str, content: Optional[str] = None, html_bytes: int = 0) -> "ExtractionResult":
+        return cls(url, content=content, error=error, success=False, html_bytes=html_bytes)
+
+    @property
+    def content_bytes(self) -> int:
+        return len(self.content.encode("utf-8")) if self.content else 0
+
+    def __repr__(self) -> str:
+        status = "ok" if self.success else f"error={self.error!r}"
+        return f"ExtractionResult({self.url!r}, {status}, {self.content_bytes} text bytes, {self.html_bytes} html bytes)"
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Dict, Tuple
+import aiohttp
+
+"""
+Process-wide registry of pooled aiohttp sessions, one per outbound service.
+Sessions keep connections alive between requests and cache DNS lookups, so the
+hundreds of API calls in a tournament run share a handful of TCP+TLS handshakes.
+"""
+
+# Connector settings per service. Unknown names fall back to "default".
+SESSION_LIMITS = {
+    "default": {"limit": 100, "limit_per_host": 10},
+    "llm_proxy": {"limit": 50, "limit_per_host": 50},
+    "serper": {"limit": 20, "limit_per_host": 20},
+    "perplexity": {"limit": 10, "limit_per_host": 10},
+    "brightdata": {"limit": 60, "limit_per_host": 60},
+    "metaculus": {"limit": 20, "limit_per_host": 20},
+}
+
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 60  # seconds an idle connection is kept open
+
+_sessions: Dict[str, Tuple[aiohttp.ClientSession, asyncio.AbstractEventLoop]] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _trace_config(name: str) -> aiohttp.TraceConfig:
+    counters = _stats.setdefault(name, {"new": 0, "reused": 0})
+
+    async def on_create(session, ctx, params):
+        counters["new"] += 1
+
+    async def on_reuse(session, ctx, params):
+        counters["reused"] += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_end.append(on_create)
+    trace_config.on_connection_reuseconn.append(on_reuse)
+    return trace_config
+
+
+def get_session(name: str = "default") -> aiohttp.ClientSession:
+    """
+    Returns the shared session for `name`, creating it on first use in the running
+    event loop. Callers must not close it; use close_all_sessions() at shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _sessions.get(name)
+    if entry is not None:
+        session, session_loop = entry
+        if not session.closed and session_loop is loop:
+            return session
+
+    limits = SESSION_LIMITS.get(name, SESSION_LIMITS["default"])
+    connector = aiohttp.TCPConnector(
+        limit=limits["limit"],
+        limit_per_host=limits["limit_per_host"],
+        ttl_dns_cache=DNS_CACHE_TTL,
+        use_dns_cache=True,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    session = aiohttp.ClientSession(connector=connector, trace_configs=[_trace_config(name)])
+    _sessions[name] = (session, loop)
+    return session
+
+
+def connection_stats() -> Dict[str, Dict[str, int]]:
+    """Returns {session name: {"new": n, "reused": n}} for this process."""
+    return {name: dict(counters) for name, counters in _stats.items()}
+
+
+def print_connection_stats():
+    stats = connection_stats()
+    if not stats:
+        return
+    total_new = sum(c["new"] for c in stats.values())
+    total_reused = sum(c["reused"] for c in stats.values())
+    print(f"\n🔌 HTTP connections: {total_new} new, {total_reused} reused")
+    for name, counters in sorted(stats.items()):
+        print(f"   {name}: {counters['new']} new, {counters['reused']} reused")
+
+
+async def close_all_sessions():
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session, _ in sessions:
+        if not session.closed:
+            await session.close()
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+from typing import Awaitable, Callable, Optional
+from disk_cache import DiskCache
+
+"""
+Content-addressed cache for LLM completions.
+
+Responses are keyed by (model, system context, prompt, sampling params, sample index),
+so repeated forecasters on the same prompt keep distinct answers while identical
+reruns are served from disk. LLM_CACHE_MODE selects the behaviour:
+    "read_write" (default): serve hits, call the API and store on misses
+    "replay": serve hits only, raise LLMCacheMiss otherwise (no API spend)
+    "off": bypass the cache entirely
+
+Article summaries get their own, longer-lived cache keyed by (article, question,
+model): a summary of the same text for the same question does not go stale, and
+the hourly runs and both search branches keep hitting the same articles.
+"""
+
+CACHE_MODES = ("off", "read_write", "replay")
+
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "read_write")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600
+LLM_CACHE_MAX_BYTES = int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024)
+SUMMARY_CACHE_TTL = float(os.getenv("SUMMARY_CACHE_TTL_HOURS", str(14 * 24))) * 3600
+SUMMARY_CACHE_MAX_BYTES = int(float(os.getenv("SUMMARY_CACHE_MAX_MB", "128")) * 1024 * 1024)
+
+SUMMARY_QUESTION_FIELDS = ("title", "resolution_criteria", "fine_print", "description")
+
+_cache: Optional[DiskCache] = None
+_summary_cache: Optional[DiskCache] = None
+
+
+class LLMCacheMiss(Exception):
+    pass
+
+
+def set_cache_mode(mode: str):
+    global LLM_CACHE_MODE
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {CACHE_MODES}")
+    LLM_CACHE_MODE = mode
+
+
+def get_llm_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache("llm_responses", ttl=LLM_CACHE_TTL, max_bytes=LLM_CACHE_MAX_BYTES, compress=True)
+    return _cache
+
+
+def get_summary_cache() -> DiskCache:
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = DiskCache(
+            "article_summaries", ttl=SUMMARY_CACHE_TTL, max_bytes=SUMMARY_CACHE_MAX_BYTES, compress=True
+        )
+    return _summary_cache
+
+
+def summary_cache_key(article: str, question_details: dict, model: str) -> str:
+    article_hash = hashlib.sha256(article.encode("utf-8")).hexdigest()
+    question_hash = hashlib.sha256(
+        json.dumps({field: question_details.get(field) for field in SUMMARY_QUESTION_FIELDS}, sort_keys=True)
+        .encode("utf-8")
+    ).hexdigest()
+    return f"{model}:{question_hash}:{article_hash}"
+
+
+def cache_key(model: str, system: str, prompt: str, params: Optional[dict] = None, sample_index: int = 0) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "system": system,
+            "prompt": prompt,
+            "params": params or {},
+            "sample_index": sample_index,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def cached_completion(
+    call: Callable[[], Awaitable[str]],
+    *,
+    model: str,
+    system: str,
+    prompt: str,
+    params: Optional[dict] = None,
+    sample_index: int = 0,
+) -> str:
+    """
+    Returns the cached completion for this request, or awaits `call()` and stores
+    its (non-empty) result. `call` must raise on failure so errors are never cached.
+    """
+    if LLM_CACHE_MODE == "off":
+        return await call()
+
+    cache = get_llm_cache()
+    key = cache_key(model, system, prompt, params, sample_index)
+    entry = cache.get_json(key)
+    if entry is not None:
+        print(f"[llm_cache] Hit for {model} (sample {sample_index})")
+        return entry["text"]
+
+    if LLM_CACHE_MODE == "replay":
+        raise LLMCacheMiss(f"No cached {model} response (sample {sample_index}) in replay mode")
+
+    text = await call()
+    if text:
+        cache.set_json(key, {"model": model, "text": text})
+    return text
@@ -1,14 +1,18 @@
 import asyncio
 import numpy as np
 import os
-from aiohttp import ClientSession, ClientTimeout, ClientError
+from aiohttp import ClientTimeout, ClientError
 import json
 import sys
-from openai import OpenAI
+from openai import AsyncOpenAI, RateLimitError
 import re
 import io
 from dotenv import load_dotenv
 from prompts import claude_context, gpt_context
+from http_session import get_session
+from llm_cache import LLMCacheMiss, cached_completion
+from metrics import record_usage
+from rate_limiter import estimate_tokens, rate_limited, retry_after_seconds
 """
 This file contains the main forecasting logic, question-type specific functions are abstracted.
 """
@@ -21,6 +25,29 @@ load_dotenv()
 METACULUS_TOKEN = os.getenv("METACULUS_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+CLAUDE_THINKING_BUDGET = 12000
+
+_openai_client = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Returns the process-wide AsyncOpenAI client. It is created lazily so that the
+    whole run shares one connection pool and no call blocks the event loop.
+    """
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return _openai_client
+
+
+async def close_openai_client():
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
 async def call_anthropic_api(prompt, max_tokens=16000, max_retries=7, cached_content=claude_context):
     url = "https://llm-proxy.metaculus.com/proxy/anthropic/v1/messages/"
     headers = {
@@ -34,11 +61,11 @@ async def call_anthropic_api(prompt, max_tokens=16000, max_retries=7, cached_con
     }
     
     data = {
-        "model": "claude-sonnet-4-20250514",
+        "model": CLAUDE_MODEL,
         "max_tokens": max_tokens,
         "thinking" : {
             "type": "enabled",
-            "budget_tokens": 12000
+            "budget_tokens": CLAUDE_THINKING_BUDGET
         },
         "system": [
             {
@@ -55,6 +82,8 @@ async def call_anthropic_api(prompt, max_tokens=16000, max_retries=7, cached_con
         ]
     }
 
+    estimated_tokens = estimate_tokens(cached_content + prompt)
+
     for attempt in range(max_retries):
         backoff_delay = min(2 ** attempt, 60)
         
@@ -62,33 +91,39 @@ async def call_anthropic_api(prompt, max_tokens=16000, max_retries=7, cached_con
             write(f"Starting API call attempt {attempt + 1}")
             timeout = ClientTimeout(total=300)  # 5 minutes total timeout
             
-            async with ClientSession(timeout=timeout) as session:
-                async with session.post(url, headers=headers, json=data) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        write(f"API error (status {response.status}): {error_text}")
-                        
-                        if response.status in [429, 503]:  # Rate limit or service unavailable
-                            write(f"Retryable error. Waiting {backoff_delay} seconds...")
-                            await asyncio.sleep(backoff_delay)
-                            continue
-                            
-                        response.raise_for_status()
-                    
-                    result = await response.json()
-                    text = ""
-                    thinking = ""
-                    for block in result.get("content", []):
-                        if block.get("type") == "text":
-                           text = block.get("text")
-                        if block.get("type") == "thinking":
-                            thinking = block.get("thinking")
-                    
-                    print(f"Claude's thinking: {thinking}")
-                    return text
+            session = get_session("llm_proxy")
+            async with rate_limited("anthropic", tokens=estimated_tokens) as limiter, \
+                    session.post(url, headers=headers, json=data, timeout=timeout) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    write(f"API error (status {response.status}): {error_text}")
                     
-                    write("No 'text' block found in content.")
-                    return "No final answer found in Claude response."
+                    if response.status in [429, 503]:  # Rate limit or service unavailable
+                        # Pause every Anthropic caller; the next attempt waits in the scheduler
+                        delay = retry_after_seconds(response.headers, backoff_delay)
+                        write(f"Retryable error. Pausing Anthropic calls for {delay} seconds...")
+                        limiter.penalize(delay)
+                        continue
+                        
+                    response.raise_for_status()
+                
+                result = await response.json()
+                usage = result.get("usage") or {}
+                record_usage(CLAUDE_MODEL, usage.get("input_tokens"), usage.get("output_tokens"))
+                limiter.record_tokens(estimated_tokens, usage.get("input_tokens"))
+                text = ""
+                thinking = ""
+                for block in result.get("content", []):
+                    if block.get("type") == "text":
+                       text = block.get("text")
+                    if block.get("type") == "thinking":
+                        thinking = block.get("thinking")
+                
+                print(f"Claude's thinking: {thinking}")
+                return text
+                
+                write("No 'text' block found in content.")
+                return "No final answer found in Claude response."
                         
         except (ClientError, asyncio.TimeoutError) as e:
             write(f"Retryable error on attempt {attempt + 1}: {str(e)}")
@@ -105,9 +140,16 @@ async def call_anthropic_api(prompt, max_tokens=16000, max_retries=7, cached_con
     raise Exception(f"Failed after {max_retries} attempts")
 
 
-async def call_claude(prompt):
+async def call_claude(prompt, sample_index=0):
     try:
-        response = await call_anthropic_api(prompt)
+        response = await cached_completion(
+            lambda: call_anthropic_api(prompt),
+            model=CLAUDE_MODEL,
+            system=claude_context,
+            prompt=prompt,
+            params={"max_tokens": 16000, "thinking_budget": CLAUDE_THINKING_BUDGET},
+            sample_index=sample_index,
+        )
         
         if not response:
             write("Warning: Empty response from Anthropic API")
@@ -115,6 +157,8 @@ async def call_claude(prompt):
             
         return response
         
+    except LLMCacheMiss:
+        raise  # replay runs must fail on a miss, not score an error string
     except Exception as e:
         write(f"Error in call_claude: {str(e)}")
         return f"Error generating response: {str(e)}"
@@ -144,27 +188,44 @@ def extract_and_run_python_code(llm_output: str) -> str:
 
     return new_stdout.getvalue()
 
+async def create_response(model, input_text):
+    """
+    Calls the OpenAI Responses API through the shared client and the OpenAI rate
+    limiter, records token usage, and returns the output text.
+    """
+    client = get_openai_client()
+    estimated_tokens = estimate_tokens(input_text)
+    async with rate_limited("openai", tokens=estimated_tokens) as limiter:
+        try:
+            response = await client.responses.create(
+                model=model,
+                input=input_text
+            )
+        except RateLimitError as e:
+            limiter.penalize(retry_after_seconds(e.response.headers, 30))
+            raise
+    if response.usage:
+        record_usage(model, response.usage.input_tokens, response.usage.output_tokens)
+        limiter.record_tokens(estimated_tokens, response.usage.input_tokens)
+    return response.output_text
+
 # Calls o4-mini using personal OpenAI credentials
 async def call_gpt(prompt):
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    response = client.responses.create(
-        model="o4-mini",
-        input= gpt_context + "\n" + prompt
-    )
-    return response.output_text
+    return await create_response("o4-mini", gpt_context + "\n" + prompt)
 
 async def call_gpt_o3_personal(prompt):
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    response = client.responses.create(
-        model="o3",
-        input= gpt_context + "\n" + prompt
-    )
-    return response.output_text
+    return await create_response("o3", gpt_context + "\n" + prompt)
 
 
-async def call_gpt_o3(prompt):
+async def call_gpt_o3(prompt, sample_index=0):
     # Temporarily short metaculus proxy using personal credits.
-    ans = await call_gpt_o3_personal(prompt)
+    ans = await cached_completion(
+        lambda: call_gpt_o3_personal(prompt),
+        model="o3",
+        system=gpt_context,
+        prompt=prompt,
+        sample_index=sample_index,
+    )
     return ans
     try:
         url = "https://llm-proxy.metaculus.com/proxy/openai/v1/chat/completions"
@@ -180,56 +241,72 @@ async def call_gpt_o3(prompt):
         
         timeout = ClientTimeout(total=300)  # 5 minutes total timeout
         
-        async with ClientSession(timeout=timeout) as session:
-            async with session.post(url, headers=headers, json=data) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    write(f"API error (status {response.status}): {error_text}")
-                    response.raise_for_status()
-                
-                result = await response.json()
-                
-                answer = result['choices'][0]['message']['content']
-                if answer is None:
-                    raise ValueError("No answer returned from GPT")
-                return answer
+        session = get_session("llm_proxy")
+        async with session.post(url, headers=headers, json=data, timeout=timeout) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                write(f"API error (status {response.status}): {error_text}")
+                response.raise_for_status()
+            
+            result = await response.json()
+            
+            answer = result['choices'][0]['message']['content']
+            if answer is None:
+                raise ValueError("No answer returned from GPT")
+            return answer
                 
     except Exception as e:
         write(f"Error in call_gpt: {str(e)}")
         return f"Error generating response: {str(e)}"
 
 
-async def call_gpt_o4_mini(prompt):
-    prompt = gpt_context + "\n" + prompt
-    try:
-        url = "https://llm-proxy.metaculus.com/proxy/openai/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Token {METACULUS_TOKEN}"
-        }
-        
-        data = {
-            "model": "o4-mini",
-            "messages": [{"role": "user", "content": prompt}],
-        }
+async def _call_proxy_chat(model, prompt):
+    url = "https://llm-proxy.metaculus.com/proxy/openai/v1/chat/completions"
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Token {METACULUS_TOKEN}"
+    }
+    
+    data = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    
+    timeout = ClientTimeout(total=300)  # 5 minutes total timeout
+    
+    estimated_tokens = estimate_tokens(prompt)
+    session = get_session("llm_proxy")
+    async with rate_limited("openai", tokens=estimated_tokens) as limiter, \
+            session.post(url, headers=headers, json=data, timeout=timeout) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            write(f"API error (status {response.status}): {error_text}")
+            if response.status == 429:
+                limiter.penalize(retry_after_seconds(response.headers, 30))
+            response.raise_for_status()
         
-        timeout = ClientTimeout(total=300)  # 5 minutes total timeout
+        result = await response.json()
+        usage = result.get("usage") or {}
+        record_usage(model, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        limiter.record_tokens(estimated_tokens, usage.get("prompt_tokens"))
         
-        async with ClientSession(timeout=timeout) as session:
-            async with session.post(url, headers=headers, json=data) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    write(f"API error (status {response.status}): {error_text}")
-                    response.raise_for_status()
-                
-                result = await response.json()
-                
-                answer = result['choices'][0]['message']['content']
-                if answer is None:
-                    raise ValueError("No answer returned from GPT")
-                return answer
-                
+        answer = result['choices'][0]['message']['content']
+        if answer is None:
+            raise ValueError("No answer returned from GPT")
+        return answer
+
+
+async def call_gpt_o4_mini(prompt, sample_index=0):
+    try:
+        return await cached_completion(
+            lambda: _call_proxy_chat("o4-mini", gpt_context + "\n" + prompt),
+            model="o4-mini",
+            system=gpt_context,
+            prompt=prompt,
+            sample_index=sample_index,
+        )
+    except LLMCacheMiss:
+        raise  # replay runs must fail on a miss, not score an error string
     except Exception as e:
         write(f"Error in call_gpt: {str(e)}")
         return f"Error generating response: {str(e)}"
-    
@@ -8,9 +8,22 @@ dotenv.load_dotenv()
 from forecaster import binary_forecast, numeric_forecast, multiple_choice_forecast
 
 import numpy as np
-import requests
 from asknews_sdk import AskNewsSDK
-from search import call_gpt
+from search import call_gpt, close_asknews_client
+from llm_calls import close_openai_client
+from http_session import close_all_sessions, print_connection_stats
+from browser import close_browser_pool
+from extraction_pool import shutdown_extraction_pool
+from metaculus_api import (
+    get_post_details,
+    get_question_details,
+    list_all,
+    post_comment,
+    post_forecasts,
+)
+from metrics import print_latency_stats, start_cost_tracking
+from article_cache import close_article_cache
+from question_state import close_state_store, forecast_decision, get_state_store, question_fingerprint
 
 DIR_NAME = "2025_Fall_tournament_forecasts"
 
@@ -24,6 +37,7 @@ SUBMIT_PREDICTION = True  # set to True to publish your predictions to Metaculus
 USE_EXAMPLE_QUESTIONS = True # set to True to forecast example questions rather than the tournament questions
 NUM_RUNS_PER_QUESTION = 5  # The median forecast is taken between NUM_RUNS_PER_QUESTION runs
 SKIP_PREVIOUSLY_FORECASTED_QUESTIONS = True
+INCREMENTAL_RUNS = True  # with skipping on, still re-forecast questions that changed or went stale (see question_state.py)
 RUN = True
 
 # Environment variables
@@ -61,48 +75,69 @@ EXAMPLE_QUESTIONS = [  # (question_id, post_id)
 ######################### HELPER FUNCTIONS #########################
 
 # @title Helper functions
-AUTH_HEADERS = {"headers": {"Authorization": f"Token {METACULUS_TOKEN}"}}
-API_BASE_URL = "https://www.metaculus.com/api"
+async def post_question_comment(post_id: int, comment_text: str) -> None:
+    """
+    Post a comment on the question page as the bot user.
+    """
+    await post_comment(post_id, comment_text)
 
 
-def post_question_comment(post_id: int, comment_text: str) -> None:
+async def post_question_prediction(question_id: int, forecast_payload: dict) -> None:
     """
-    Post a comment on the question page as the bot user.
+    Post a forecast on a question.
     """
+    await post_forecasts([{"question": question_id, **forecast_payload}])
+
 
-    response = requests.post(
-        f"{API_BASE_URL}/comments/create/",
-        json={
-            "text": comment_text,
-            "parent": None,
-            "included_forecast": True,
-            "is_private": True,
-            "on_post": post_id,
-        },
-        **AUTH_HEADERS,  # type: ignore
+def record_submitted_forecast(queued_forecast: dict) -> None:
+    """
+    Remembers a posted forecast in the question-state store for incremental runs.
+    """
+    get_state_store().record_forecast(
+        queued_forecast["question_id"],
+        queued_forecast["post_id"],
+        queued_forecast["fingerprint"],
+        queued_forecast["forecast"],
+        run_cost=queued_forecast["run_cost"],
     )
-    if not response.ok:
-        raise RuntimeError(response.text)
 
 
-def post_question_prediction(question_id: int, forecast_payload: dict) -> None:
+async def submit_queued_forecasts(queued: list[dict]) -> list[Exception]:
     """
-    Post a forecast on a question.
+    Posts every queued forecast in one bulk request, then the comments that go
+    with them. If the bulk request is rejected, forecasts are posted one by one
+    so a single invalid payload does not block the rest. Returns the errors.
     """
-    url = f"{API_BASE_URL}/questions/forecast/"
-    response = requests.post(
-        url,
-        json=[
-            {
-                "question": question_id,
-                **forecast_payload,
-            },
-        ],
-        **AUTH_HEADERS,  # type: ignore
+    errors = []
+    submitted = queued
+    try:
+        await post_forecasts([{"question": q["question_id"], **q["payload"]} for q in queued])
+    except Exception as e:
+        print(f"Bulk forecast submission failed ({e}), posting forecasts individually")
+        results = await asyncio.gather(
+            *(post_question_prediction(q["question_id"], q["payload"]) for q in queued),
+            return_exceptions=True,
+        )
+        submitted = []
+        for q, result in zip(queued, results):
+            if isinstance(result, Exception):
+                print(f"Forecast for question {q['question_id']} could not be posted: {result}")
+                errors.append(result)
+            else:
+                submitted.append(q)
+
+    for q in submitted:
+        record_submitted_forecast(q)
+
+    results = await asyncio.gather(
+        *(post_question_comment(q["post_id"], q["comment"]) for q in submitted),
+        return_exceptions=True,
     )
-    print(f"Prediction Post status code: {response.status_code}")
-    if not response.ok:
-        raise RuntimeError(response.text)
+    for q, result in zip(submitted, results):
+        if isinstance(result, Exception):
+            print(f"Comment for post {q['post_id']} could not be posted: {result}")
+            errors.append(result)
+    return errors
 
 
 def create_forecast_payload(
@@ -138,15 +173,11 @@ def create_forecast_payload(
     }
 
 
-def list_posts_from_tournament(
-    tournament_id: int = TOURNAMENT_ID, offset: int = 0, count: int = 50
-) -> list[dict]:
+async def list_posts_from_tournament(tournament_id: int = TOURNAMENT_ID) -> list[dict]:
     """
-    List (all details) {count} posts from the {tournament_id}
+    List (all details) every open post from the {tournament_id}, across all pages
     """
     url_qparams = {
-        "limit": count,
-        "offset": offset,
         "order_by": "-hotness",
         "forecast_type": ",".join(
             [
@@ -159,29 +190,13 @@ def list_posts_from_tournament(
         "statuses": "open",
         "include_description": "true",
     }
-    url = f"{API_BASE_URL}/posts/"
-    response = requests.get(url, **AUTH_HEADERS, params=url_qparams)  # type: ignore
-    if not response.ok:
-        raise Exception(response.text)
-    data = json.loads(response.content)
-    return data
-
-def get_question_details(question_id: int) -> dict:
-    url = f"https://www.metaculus.com/api/questions/{question_id}/"
-    response = requests.get(url, **AUTH_HEADERS)
-    if not response.ok:
-        print(f"Question extraction with url {url} failed")
-        raise Exception(response.text)
-    data = json.loads(response.content)
-    print("Question data retrieved successfully")
-    print(data)
-    return data
-
-def get_open_question_ids_from_tournament() -> list[tuple[int, int]]:
-    posts = list_posts_from_tournament()
+    return await list_all("posts/", params=url_qparams)
+
+async def get_open_question_ids_from_tournament() -> list[tuple[int, int]]:
+    posts = await list_posts_from_tournament()
 
     post_dict = dict()
-    for post in posts["results"]:
+    for post in posts:
         if question := post.get("question"):
             # single question post
             post_dict[post["id"]] = [question]
@@ -199,23 +214,6 @@ def get_open_question_ids_from_tournament() -> list[tuple[int, int]]:
     return open_question_id_post_id
 
 
-def get_post_details(post_id: int) -> dict:
-    """
-    Get all details about a post from the Metaculus API.
-    """
-    url = f"{API_BASE_URL}/posts/{post_id}/"
-    print(f"Getting details for {url}")
-    response = requests.get(
-        url,
-        **AUTH_HEADERS,  # type: ignore
-    )
-    if not response.ok:
-        print(f"Post extraction with url {url} failed")
-        raise Exception(response.text)
-    details = json.loads(response.content)
-    return details
-
-
 ################### FORECASTING ###################
 def forecast_is_already_made(question_details: dict) -> bool:
     try:
@@ -230,23 +228,43 @@ async def forecast_individual_question(
     submit_prediction: bool,
     num_runs_per_question: int,
     skip_previously_forecasted_questions: bool,
+    submission_queue: list[dict] | None = None,
 ) -> str:
+    """
+    Forecasts one question. With a `submission_queue`, the forecast and its comment
+    are appended to it for bulk submission instead of being posted right away.
+    """
     try:
-        post_details = get_post_details(post_id)
+        post_details = await get_post_details(post_id)
         question_details = post_details["question"]
     except KeyError:
         print(f"Fallback to question details API for question_id={question_id}")
-        question_details = get_question_details(question_id)
+        question_details = await get_question_details(question_id)
 
     title = question_details["title"]
     question_type = question_details["type"]
 
-    if forecast_is_already_made(question_details) and skip_previously_forecasted_questions:
+    skip_reason = None
+    if skip_previously_forecasted_questions and INCREMENTAL_RUNS:
+        state_store = get_state_store()
+        record = state_store.get(question_id)
+        if record is None and forecast_is_already_made(question_details):
+            record = state_store.seed_from_metaculus(question_id, post_id, question_details)
+        should_forecast, reason = forecast_decision(question_details, record)
+        print(f"Question {question_id}: {'forecasting' if should_forecast else 'skipping'} ({reason})")
+        if not should_forecast:
+            skip_reason = reason
+    elif forecast_is_already_made(question_details) and skip_previously_forecasted_questions:
+        skip_reason = "Forecast already made"
+
+    if skip_reason:
         summary_of_forecast = f"-----------------------------------------------\nQuestion: {title}\n"
         summary_of_forecast += f"URL: https://www.metaculus.com/questions/{post_id}/\n"
-        summary_of_forecast += "Skipped: Forecast already made\n"
+        summary_of_forecast += f"Skipped: {skip_reason}\n"
         return summary_of_forecast
 
+    cost_tracker = start_cost_tracking()
+
     summary_of_forecast = f"-----------------------------------------------\nQuestion: {title}\n"
     summary_of_forecast += f"URL: https://www.metaculus.com/questions/{post_id}/\n"
 
@@ -304,11 +322,26 @@ Forecast Explanation:
         print(f"Forecast was retrieved successfully with value {forecast}")
         print(f"Forecast is of type {type(forecast)}")
 
+        summary_of_forecast += f"Run cost: {cost_tracker.summary()}\n"
+
         if submit_prediction:
-            forecast_payload = create_forecast_payload(forecast, question_type)
-            post_question_prediction(question_id, forecast_payload)
-            post_question_comment(post_id, short_comment)
-            summary_of_forecast += "Posted: Forecast was posted to Metaculus.\n"
+            queued_forecast = {
+                "question_id": question_id,
+                "post_id": post_id,
+                "payload": create_forecast_payload(forecast, question_type),
+                "comment": short_comment,
+                "forecast": forecast,
+                "fingerprint": question_fingerprint(question_details),
+                "run_cost": cost_tracker.usd,
+            }
+            if submission_queue is not None:
+                submission_queue.append(queued_forecast)
+                summary_of_forecast += "Posted: Forecast was queued for bulk submission to Metaculus.\n"
+            else:
+                await post_question_prediction(question_id, queued_forecast["payload"])
+                record_submitted_forecast(queued_forecast)
+                await post_question_comment(post_id, short_comment)
+                summary_of_forecast += "Posted: Forecast was posted to Metaculus.\n"
 
         write_to_file(summary_of_forecast)
 
@@ -322,6 +355,7 @@ async def forecast_questions(
     num_runs_per_question: int,
     skip_previously_forecasted_questions: bool,
 ) -> None:
+    submission_queue = []
     forecast_tasks = [
         forecast_individual_question(
             question_id,
@@ -329,10 +363,23 @@ async def forecast_questions(
             submit_prediction,
             num_runs_per_question,
             skip_previously_forecasted_questions,
+            submission_queue,
         )
         for question_id, post_id in open_question_id_post_id
     ]
-    forecast_summaries = await asyncio.gather(*forecast_tasks, return_exceptions=True)
+    try:
+        forecast_summaries = await asyncio.gather(*forecast_tasks, return_exceptions=True)
+        submission_errors = await submit_queued_forecasts(submission_queue) if submission_queue else []
+    finally:
+        await close_openai_client()
+        await close_asknews_client()
+        await close_all_sessions()
+        await close_browser_pool()
+        shutdown_extraction_pool()
+        close_state_store()
+        close_article_cache()
+        print_connection_stats()
+        print_latency_stats()
     print("\n", "#" * 100, "\nForecast Summaries\n", "#" * 100)
 
     errors = []
@@ -347,6 +394,7 @@ async def forecast_questions(
             errors.append(forecast_summary)
         else:
             print(forecast_summary)
+    errors.extend(submission_errors)
 
     if errors:
         print("-----------------------------------------------\nErrors:\n")
@@ -361,16 +409,18 @@ async def forecast_questions(
 if __name__ == "__main__":
     if not RUN:
         exit()
-    if USE_EXAMPLE_QUESTIONS:
-        open_question_id_post_id = EXAMPLE_QUESTIONS
-    else:
-        open_question_id_post_id = get_open_question_ids_from_tournament()
 
-    asyncio.run(
-        forecast_questions(
+    async def run():
+        if USE_EXAMPLE_QUESTIONS:
+            open_question_id_post_id = EXAMPLE_QUESTIONS
+        else:
+            open_question_id_post_id = await get_open_question_ids_from_tournament()
+
+        await forecast_questions(
             open_question_id_post_id,
             SUBMIT_PREDICTION,
             NUM_RUNS_PER_QUESTION,
             SKIP_PREVIOUSLY_FORECASTED_QUESTIONS,
         )
-    )
\ No newline at end of file
+
+    asyncio.run(run())
\ No newline at end of file
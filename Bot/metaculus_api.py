@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+import aiohttp
+import dotenv
+from http_session import get_session
+
+"""
+Async client for the Metaculus API. Every call goes through the shared "metaculus"
+session, so concurrent questions reuse the same keep-alive connections, and
+transient failures (timeouts, 429 and 5xx responses) are retried with backoff.
+"""
+
+dotenv.load_dotenv()
+
+METACULUS_TOKEN = os.getenv("METACULUS_TOKEN")
+API_BASE_URL = "https://www.metaculus.com/api"
+
+MAX_RETRIES = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT = 60  # seconds
+PAGE_SIZE = 50
+PAGE_PREFETCH = 4  # pages requested concurrently while paginating
+
+
+class MetaculusAPIError(RuntimeError):
+    def __init__(self, status: int, text: str, url: str = ""):
+        super().__init__(text)
+        self.status = status
+        self.url = url
+
+
+def _auth_headers() -> Dict[str, str]:
+    return {"Authorization": f"Token {METACULUS_TOKEN}"} if METACULUS_TOKEN else {}
+
+
+def _query_params(params: Optional[dict]) -> Optional[List[tuple]]:
+    """Expands list values into repeated keys, as requests does (aiohttp rejects lists)."""
+    if params is None:
+        return None
+    pairs = []
+    for key, value in params.items():
+        for item in value if isinstance(value, (list, tuple)) else [value]:
+            pairs.append((key, str(item)))
+    return pairs
+
+
+def _retry_delay(attempt: int, response: Optional[aiohttp.ClientResponse] = None) -> float:
+    backoff_delay = min(2 ** attempt, 60)
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), 120)
+            except ValueError:
+                pass
+    return backoff_delay
+
+
+async def request_json(
+    method: str,
+    url: str,
+    *,
+    params: Optional[dict] = None,
+    json_body: Any = None,
+    auth: bool = True,
+    max_retries: int = MAX_RETRIES,
+    retry_statuses: set = RETRY_STATUSES,
+    retry_transport_errors: bool = True,
+) -> Any:
+    """
+    Sends a request to `url` (absolute, or a path under API_BASE_URL) and returns the
+    decoded JSON body, or None for an empty body. Raises MetaculusAPIError once the
+    retries are exhausted or on a non-retryable error status. Without
+    `retry_transport_errors`, only failures to connect are retried: a disconnect or
+    timeout may come after the server has already acted on the request.
+    """
+    if not url.startswith("http"):
+        url = f"{API_BASE_URL}/{url.lstrip('/')}"
+    headers = _auth_headers() if auth else {}
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+
+    for attempt in range(max_retries):
+        last_attempt = attempt == max_retries - 1
+        try:
+            session = get_session("metaculus")
+            async with session.request(
+                method, url, params=_query_params(params), json=json_body, headers=headers, timeout=timeout
+            ) as response:
+                text = await response.text()
+                if response.status in retry_statuses and not last_attempt:
+                    delay = _retry_delay(attempt, response)
+                    print(f"[metaculus_api] {method} {url} returned {response.status}, retrying in {delay}s")
+                    await asyncio.sleep(delay)
+                    continue
+                if response.status >= 400:
+                    raise MetaculusAPIError(response.status, text, url)
+                return json.loads(text) if text else None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if last_attempt or not (retry_transport_errors or isinstance(e, aiohttp.ClientConnectorError)):
+                raise MetaculusAPIError(0, f"{type(e).__name__}: {e}", url) from e
+            delay = _retry_delay(attempt)
+            print(f"[metaculus_api] {method} {url} failed ({type(e).__name__}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+    raise MetaculusAPIError(0, f"Failed after {max_retries} attempts", url)
+
+
+async def list_all(url: str, params: Optional[dict] = None, page_size: int = PAGE_SIZE,
+                   prefetch: int = PAGE_PREFETCH, auth: bool = True) -> List[dict]:
+    """
+    Returns the "results" of every page of a limit/offset paginated endpoint.
+    The first page reports the total count; the remaining pages are then fetched
+    `prefetch` at a time. Endpoints without a count are followed via "next".
+    """
+    params = dict(params or {})
+    params["limit"] = page_size
+    params["offset"] = params.get("offset", 0)
+    first = await request_json("GET", url, params=params, auth=auth)
+    results = list(first.get("results", []))
+
+    count = first.get("count")
+    if count is None:
+        next_url = first.get("next")
+        while next_url:
+            page = await request_json("GET", next_url, auth=auth)
+            results.extend(page.get("results", []))
+            next_url = page.get("next")
+        return results
+
+    semaphore = asyncio.Semaphore(prefetch)
+
+    async def fetch_page(offset: int) -> List[dict]:
+        async with semaphore:
+            page = await request_json("GET", url, params={**params, "offset": offset}, auth=auth)
+            return page.get("results", [])
+
+    offsets = range(params["offset"] + page_size, count, page_size)
+    for page in await asyncio.gather(*(fetch_page(offset) for offset in offsets)):
+        results.extend(page)
+    return results
+
+
+async def get_post_details(post_id: int) -> dict:
+    """
+    Get all details about a post from the Metaculus API.
+    """
+    print(f"Getting details for {API_BASE_URL}/posts/{post_id}/")
+    return await request_json("GET", f"posts/{post_id}/")
+
+
+async def get_question_details(question_id: int) -> dict:
+    data = await request_json("GET", f"questions/{question_id}/")
+    print("Question data retrieved successfully")
+    print(data)
+    return data
+
+
+async def post_forecasts(forecasts: List[dict]) -> None:
+    """
+    Posts several forecasts in one request. Each entry is {"question": id, **payload}.
+    """
+    if not forecasts:
+        return
+    await request_json("POST", "questions/forecast/", json_body=forecasts)
+    print(f"Posted {len(forecasts)} forecast(s) to Metaculus")
+
+
+async def post_comment(post_id: int, comment_text: str) -> None:
+    """
+    Post a private comment on the question page as the bot user. Server errors,
+    disconnects and timeouts are not retried, since the comment may already have
+    been created.
+    """
+    await request_json(
+        "POST",
+        "comments/create/",
+        json_body={
+            "text": comment_text,
+            "parent": None,
+            "included_forecast": True,
+            "is_private": True,
+            "on_post": post_id,
+        },
+        retry_statuses={429},
+        retry_transport_errors=False,
+    )
@@ -0,0 +1,155 @@
+import bisect
+import contextlib
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+"""
+Per-question run metrics. A CostTracker is installed in the context of the task
+that forecasts a question; every LLM call made by that task (or by tasks it spawns,
+which inherit the context) adds its token usage to it. cost_scope() nests a child
+tracker, e.g. around one agentic search step, whose usage also counts towards the
+question; record_metric() attaches other per-step measurements to the same trackers.
+Latency histograms are process-wide (observe_latency / print_latency_stats).
+"""
+
+# USD per 1M tokens: (input, output)
+MODEL_PRICING = {
+    "claude-sonnet-4-20250514": (3.00, 15.00),
+    "o3": (2.00, 8.00),
+    "o4-mini": (1.10, 4.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "sonar-deep-research": (2.00, 8.00),
+}
+
+
+def usage_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+class CostTracker:
+    def __init__(self, parent: Optional["CostTracker"] = None):
+        self.usd = 0.0
+        self.calls = 0
+        self.tokens: Dict[str, Dict[str, int]] = {}
+        self.events: List[dict] = []
+        self.parent = parent
+
+    def add_usage(self, model: str, input_tokens: int, output_tokens: int):
+        counts = self.tokens.setdefault(model, {"input": 0, "output": 0})
+        counts["input"] += input_tokens
+        counts["output"] += output_tokens
+        self.calls += 1
+        self.usd += usage_cost(model, input_tokens, output_tokens)
+        if self.parent is not None:
+            self.parent.add_usage(model, input_tokens, output_tokens)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(c["input"] for c in self.tokens.values())
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(c["output"] for c in self.tokens.values())
+
+    def record_event(self, kind: str, **data):
+        self.events.append({"kind": kind, **data})
+        if self.parent is not None:
+            self.parent.record_event(kind, **data)
+
+    def total(self, kind: str, field: str) -> float:
+        """Sum of `field` over the recorded events of `kind`."""
+        return sum(e.get(field) or 0 for e in self.events if e["kind"] == kind)
+
+    def summary(self) -> str:
+        per_model = ", ".join(
+            f"{model}: {c['input']:,} in / {c['output']:,} out" for model, c in sorted(self.tokens.items())
+        )
+        return f"${self.usd:.4f} over {self.calls} LLM calls" + (f" ({per_model})" if per_model else "")
+
+
+_current_tracker: ContextVar[Optional[CostTracker]] = ContextVar("cost_tracker", default=None)
+
+
+def start_cost_tracking() -> CostTracker:
+    """Installs a fresh tracker for the current task and the tasks it creates."""
+    tracker = CostTracker()
+    _current_tracker.set(tracker)
+    return tracker
+
+
+def current_cost_tracker() -> Optional[CostTracker]:
+    return _current_tracker.get()
+
+
+@contextlib.contextmanager
+def cost_scope() -> Iterator[CostTracker]:
+    """Tracks the usage of the block separately, still adding it to the enclosing tracker."""
+    tracker = CostTracker(parent=_current_tracker.get())
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+
+def record_usage(model: str, input_tokens: Optional[int], output_tokens: Optional[int]):
+    """Adds one call's token usage to the current question's tracker, if any."""
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.add_usage(model, int(input_tokens or 0), int(output_tokens or 0))
+
+
+def record_metric(kind: str, **data):
+    """Attaches a measurement (e.g. one agentic search step) to the current trackers, if any."""
+    tracker = _current_tracker.get()
+    if tracker is not None:
+        tracker.record_event(kind, **data)
+
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def summary(self) -> str:
+        if not self.count:
+            return "no observations"
+        labels = [f"<={b}s" for b in self.buckets] + [f">{self.buckets[-1]}s"]
+        bars = ", ".join(f"{label}: {n}" for label, n in zip(labels, self.counts) if n)
+        return f"{self.count} calls, mean {self.total / self.count:.1f}s, max {self.max:.1f}s ({bars})"
+
+
+_latencies: Dict[str, LatencyHistogram] = {}
+
+
+def observe_latency(name: str, seconds: float):
+    """Adds one call's latency to the process-wide histogram `name` (e.g. "perplexity:ok")."""
+    _latencies.setdefault(name, LatencyHistogram()).observe(seconds)
+
+
+def latency_histogram(name: str) -> Optional[LatencyHistogram]:
+    return _latencies.get(name)
+
+
+def print_latency_stats():
+    if not _latencies:
+        return
+    print("\n⏱️ Call latencies:")
+    for name, histogram in sorted(_latencies.items()):
+        print(f"   {name}: {histogram.summary()}")
@@ -1,12 +1,14 @@
 # Revised version of get_numeric_forecast.py with extensive logging, robust error handling, and fallback logic
 
 import datetime
+import functools
 import numpy as np
 import asyncio
 import re
 import unicodedata
 import itertools
 from typing import Union
+from scipy.interpolate import PchipInterpolator
 from prompts import (
     NUMERIC_PROMPT_historical,
     NUMERIC_PROMPT_current,
@@ -15,6 +17,8 @@ from prompts import (
 )
 from llm_calls import call_claude, call_gpt_o4_mini, call_gpt_o3
 from search import process_search_queries
+from search_session import SearchSession
+from rate_limiter import PRIORITY_HIGH, request_priority
 
 VALID_KEYS = {1,5,10,15,20,25,30,35,40,45,50,55,60,65,70,75,80,85,90,95,99}
 
@@ -110,37 +114,49 @@ def extract_percentiles_from_response(text: Union[str, list], verbose: bool = Tr
         raise ValueError("❌ No valid percentiles extracted.")
     return percentiles
 
-def generate_continuous_cdf(percentile_values, open_upper_bound, open_lower_bound, upper_bound, 
-                        lower_bound, zero_point=None, *, min_step=5.0e-5, num_points=201):
-    """
-    Generate a robust continuous CDF with strict enforcement of minimum step size.
-    
-    Args:
-        percentile_values (dict): Dictionary mapping percentiles (1-99) to values
-        open_upper_bound (bool): Whether the upper bound is open
-        open_lower_bound (bool): Whether the lower bound is open
-        upper_bound (float): Maximum possible value
-        lower_bound (float): Minimum possible value
-        zero_point (float, optional): Reference point for non-linear scaling
-        min_step (float): Minimum step size between adjacent CDF points (default: 5.0e-5)
-        num_points (int): Number of points in the output CDF (default: 201)
-    
-    Returns:
-        list: A list of CDF values with strictly enforced monotonicity and step size
-    """
-    import numpy as np
-    from scipy.interpolate import PchipInterpolator
-    
-    # Validate inputs
-    if not percentile_values:
-        raise ValueError("Empty percentile values dictionary")
-    
+def _validate_cdf_bounds(upper_bound, lower_bound, zero_point):
     if upper_bound <= lower_bound:
         raise ValueError(f"Upper bound ({upper_bound}) must be greater than lower bound ({lower_bound})")
     
     if zero_point is not None:
         if abs(zero_point - lower_bound) < 1e-6 or abs(zero_point - upper_bound) < 1e-6:
             raise ValueError(f"zero_point ({zero_point}) too close to bounds [{lower_bound}, {upper_bound}]")
+
+
+@functools.lru_cache(maxsize=128)
+def _cdf_grid(lower_bound, upper_bound, zero_point, num_points):
+    """
+    Evaluation grid of the CDF, non-linear (geometric) when a zero_point is given.
+    Cached per question and returned read-only. The geometric grid keeps scalar pow():
+    NumPy's vectorised power differs from libm by an ulp, which is enough to flip the
+    exact min-step checks downstream and change the submitted CDF.
+    """
+    t = np.linspace(0, 1, num_points)
+    
+    if zero_point is None:
+        # Linear grid
+        grid = lower_bound + (upper_bound - lower_bound) * t
+    else:
+        # Non-linear grid based on zero_point
+        ratio = (upper_bound - zero_point) / (lower_bound - zero_point)
+        # Handle potential numerical issues
+        if abs(ratio - 1.0) < 1e-10:
+            grid = lower_bound + (upper_bound - lower_bound) * t
+        else:
+            grid = lower_bound + (upper_bound - lower_bound) * (
+                (np.array([ratio**tt for tt in t.tolist()]) - 1) / (ratio - 1)
+            )
+    grid.flags.writeable = False
+    return grid
+
+
+def _prepare_percentiles(percentile_values, open_upper_bound, open_lower_bound, upper_bound, lower_bound):
+    """
+    Cleans a percentile dict and returns (x_vals, percentiles, use_log), the knots
+    to interpolate through, in log space when all values are positive.
+    """
+    if not percentile_values:
+        raise ValueError("Empty percentile values dictionary")
     
     # Clean and validate percentile values
     pv = {}
@@ -193,98 +209,57 @@ def generate_continuous_cdf(percentile_values, open_upper_bound, open_lower_boun
     # Determine if log scaling is appropriate (all values positive)
     use_log = np.all(values > 0)
     x_vals = np.log(values) if use_log else values
+    return x_vals, percentiles, use_log
+
+
+def _enforce_min_steps_sequential(y_values, min_step):
+    """Reference loop: r[i] = min(r[i-1] + min_step, 1) wherever y[i] is below that."""
+    result = y_values.copy()
+    for i in range(1, len(result)):
+        if result[i] < result[i-1] + min_step:
+            result[i] = min(result[i-1] + min_step, 1.0)
+    return result
+
+
+def _enforce_min_steps(y_values, min_step):
+    """
+    Enforce minimum step size between adjacent points of a non-decreasing CDF in [0, 1].
     
-    # Create interpolator with fallback
-    try:
-        spline = PchipInterpolator(x_vals, percentiles, extrapolate=True)
-    except Exception as e:
-        # Fallback to linear interpolation
-        print(f"PchipInterpolator failed ({str(e)}), falling back to linear interpolation")
-        spline = lambda x: np.interp(x, x_vals, percentiles)
-    
-    # Generate evaluation grid based on zero_point
-    def create_grid(num_points):
-        t = np.linspace(0, 1, num_points)
-        
-        if zero_point is None:
-            # Linear grid
-            return lower_bound + (upper_bound - lower_bound) * t
-        else:
-            # Non-linear grid based on zero_point
-            ratio = (upper_bound - zero_point) / (lower_bound - zero_point)
-            # Handle potential numerical issues
-            if abs(ratio - 1.0) < 1e-10:
-                return lower_bound + (upper_bound - lower_bound) * t
-            else:
-                return np.array([
-                    lower_bound + (upper_bound - lower_bound) * 
-                    ((ratio**tt - 1) / (ratio - 1))
-                    for tt in t
-                ])
-    
-    # Generate the grid and evaluate
-    cdf_x = create_grid(num_points)
-    
-    # Handle log transformation for evaluation
-    eval_x = np.log(cdf_x) if use_log else cdf_x
-    
-    # Clamp values to avoid extrapolation issues
-    eval_x_clamped = np.clip(eval_x, x_vals[0], x_vals[-1])
-    
-    # Generate initial CDF values and clamp to [0,1]
-    cdf_y = spline(eval_x_clamped).clip(0.0, 1.0)
-    
-    # Ensure monotonicity (non-decreasing)
-    cdf_y = np.maximum.accumulate(cdf_y)
-    
-    # Set boundary values if bounds are closed
-    if not open_lower_bound:
-        cdf_y[0] = 0.0
-    if not open_upper_bound:
-        cdf_y[-1] = 1.0
+    The closed form max_{j<=i}(y[j] - j*min_step) + i*min_step locates the runs where the
+    constraint binds; each run is then rebuilt with a cumulative sum, which adds min_step
+    in the same order as the reference loop, so the result is bit-for-bit identical to
+    _enforce_min_steps_sequential. The recurrence is checked on the whole array, and the
+    loop is only used if a rounding tie put a run boundary in the wrong place.
+    """
+    n = len(y_values)
+    offsets = np.arange(n) * min_step
+    approx = np.maximum.accumulate(y_values - offsets) + offsets
+    binding = approx > y_values
+    binding[0] = False
     
-    # Strict enforcement of minimum step size with iterative approach
-    def enforce_min_steps(y_values, min_step_size):
-        """Enforce minimum step size between adjacent points"""
-        result = y_values.copy()
-        
-        # First pass: enforce minimum steps
-        for i in range(1, len(result)):
-            if result[i] < result[i-1] + min_step_size:
-                result[i] = min(result[i-1] + min_step_size, 1.0)
-        
-        # Second pass: ensure we don't exceed 1.0
-        if result[-1] > 1.0:
-            # If we've exceeded 1.0 before the end, rescale the steps
-            overflow_idx = np.where(result > 1.0)[0][0]
-            steps_remaining = len(result) - overflow_idx
-            
-            for i in range(overflow_idx, len(result)):
-                t = (i - overflow_idx) / max(1, steps_remaining - 1)
-                result[i] = min(1.0, result[overflow_idx-1] + (1.0 - result[overflow_idx-1]) * t)
-            
-            # Final check for minimum steps
-            for i in range(overflow_idx, len(result)):
-                if i > overflow_idx and result[i] < result[i-1] + min_step_size:
-                    result[i] = result[i-1] + min_step_size
-                    if result[i] > 1.0:
-                        # If we exceed 1.0 again, cap at 1.0 and adjust previous values
-                        result[i] = 1.0
-                        # Backtrack and redistribute
-                        for j in range(i-1, overflow_idx-1, -1):
-                            max_allowed = result[j+1] - min_step_size
-                            if result[j] > max_allowed:
-                                result[j] = max_allowed
-        
-        return result
+    result = y_values.copy()
+    if binding.any():
+        # Runs of binding points, each continuing from the point just before it
+        edges = np.diff(binding.astype(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if len(ends) < len(starts):
+            ends = np.append(ends, n - 1)
+        for start, end in zip(starts, ends):
+            steps = np.full(end - start + 1, min_step)
+            steps[0] = result[start]
+            result[start:end + 1] = np.minimum(np.cumsum(steps), 1.0)
     
-    # Apply strict step enforcement
-    cdf_y = enforce_min_steps(cdf_y, min_step)
+    prev_plus_step = result[:-1] + min_step
+    expected = np.where(y_values[1:] < prev_plus_step, np.minimum(prev_plus_step, 1.0), y_values[1:])
+    if not np.array_equal(result[1:], expected):
+        return _enforce_min_steps_sequential(y_values, min_step)
+    return result
 
-    cdf_y = _safe_cdf_bounds(cdf_y, open_lower_bound, open_upper_bound, min_step)
 
-    required_range = (len(cdf_y)-1) * min_step
-    available_range = cdf_y[-1] - cdf_y[0]
+def _finalize_cdf(cdf_y, open_upper_bound, open_lower_bound, min_step):
+    """Applies the Metaculus bound rules to one CDF and validates the result."""
+    cdf_y = _safe_cdf_bounds(cdf_y, open_lower_bound, open_upper_bound, min_step)
     
     # Double-check minimum step size requirement
     steps = np.diff(cdf_y)
@@ -316,10 +291,6 @@ def generate_continuous_cdf(percentile_values, open_upper_bound, open_lower_boun
         
         # Create a new CDF with exactly min_step between points where needed
         # and distribute remaining range proportionally
-        new_cdf = np.zeros_like(cdf_y)
-        new_cdf[0] = start_val
-        
-        # Get the shape from original CDF but enforce minimum steps
         if len(cdf_y) > 2:
             # Calculate normalized shape from original CDF
             orig_shape = np.diff(cdf_y)
@@ -330,12 +301,18 @@ def generate_continuous_cdf(percentile_values, open_upper_bound, open_lower_boun
             remaining = available_range - (len(cdf_y) - 1) * min_step
             extra_steps = remaining * orig_shape
             
-            for i in range(1, len(new_cdf)):
-                new_cdf[i] = new_cdf[i-1] + min_step + extra_steps[i-1]
+            # new_cdf[i] = new_cdf[i-1] + min_step + extra_steps[i-1], accumulated in that
+            # order: a running sum over [start, min_step, extra_0, min_step, extra_1, ...]
+            increments = np.empty(2 * len(extra_steps) + 1)
+            increments[0] = start_val
+            increments[1::2] = min_step
+            increments[2::2] = extra_steps
+            new_cdf = np.cumsum(increments)[::2]
         else:
             # Simple linear spacing if original shape is unavailable
-            for i in range(1, len(new_cdf)):
-                new_cdf[i] = new_cdf[i-1] + (available_range / (len(new_cdf) - 1))
+            increments = np.full(len(cdf_y), available_range / (len(cdf_y) - 1))
+            increments[0] = start_val
+            new_cdf = np.cumsum(increments)
         
         # Final validation
         if np.any(np.diff(new_cdf) < min_step - 1e-10):
@@ -356,8 +333,108 @@ def generate_continuous_cdf(percentile_values, open_upper_bound, open_lower_boun
     if not open_upper_bound and abs(cdf_y[-1] - 1.0) > 1e-10:
         raise RuntimeError(f"Failed to enforce upper bound: {cdf_y[-1]}")
     
+    return cdf_y
+
+
+def generate_continuous_cdfs(percentile_values_list, open_upper_bound, open_lower_bound, upper_bound,
+                             lower_bound, zero_point=None, *, min_step=5.0e-5, num_points=201, errors=None):
+    """
+    Batched generate_continuous_cdf for several forecasters on the same question.
+    
+    The grid (and its log) is built once, each forecaster's percentiles are interpolated
+    onto it, and clamping and monotonicity run on the whole (N, num_points) array.
+    
+    Args:
+        percentile_values_list (list): One percentile dict per forecaster
+        errors (list, optional): If given, a forecaster whose CDF cannot be built gets a row
+            of NaN and (row index, exception) is appended here; otherwise the error is raised.
+        Remaining arguments as in generate_continuous_cdf.
+    
+    Returns:
+        np.ndarray: Array of shape (N, num_points) with one CDF per row
+    """
+    _validate_cdf_bounds(upper_bound, lower_bound, zero_point)
+    
+    cdf_x = _cdf_grid(lower_bound, upper_bound, zero_point, num_points)
+    log_x = None
+    
+    cdfs = np.full((len(percentile_values_list), num_points), np.nan)
+    valid = np.zeros(len(percentile_values_list), dtype=bool)
+    
+    for i, percentile_values in enumerate(percentile_values_list):
+        try:
+            x_vals, percentiles, use_log = _prepare_percentiles(
+                percentile_values, open_upper_bound, open_lower_bound, upper_bound, lower_bound
+            )
+            
+            # Create interpolator with fallback
+            try:
+                spline = PchipInterpolator(x_vals, percentiles, extrapolate=True)
+            except Exception as e:
+                # Fallback to linear interpolation
+                print(f"PchipInterpolator failed ({str(e)}), falling back to linear interpolation")
+                spline = lambda x, x_vals=x_vals, percentiles=percentiles: np.interp(x, x_vals, percentiles)
+            
+            # Handle log transformation for evaluation
+            if use_log and log_x is None:
+                log_x = np.log(cdf_x)
+            eval_x = log_x if use_log else cdf_x
+            
+            # Clamp values to avoid extrapolation issues
+            cdfs[i] = spline(np.clip(eval_x, x_vals[0], x_vals[-1]))
+            valid[i] = True
+        except Exception as e:
+            if errors is None:
+                raise
+            errors.append((i, e))
+    
+    # Clamp to [0,1] and ensure monotonicity (non-decreasing)
+    rows = np.maximum.accumulate(cdfs[valid].clip(0.0, 1.0), axis=1)
+    
+    # Set boundary values if bounds are closed
+    if not open_lower_bound:
+        rows[:, 0] = 0.0
+    if not open_upper_bound:
+        rows[:, -1] = 1.0
+    
+    for row, i in zip(rows, np.flatnonzero(valid)):
+        try:
+            row = _enforce_min_steps(row, min_step)
+            cdfs[i] = _finalize_cdf(row, open_upper_bound, open_lower_bound, min_step)
+        except Exception as e:
+            if errors is None:
+                raise
+            errors.append((int(i), e))
+            cdfs[i] = np.nan
+    
+    return cdfs
+
+
+def generate_continuous_cdf(percentile_values, open_upper_bound, open_lower_bound, upper_bound, 
+                        lower_bound, zero_point=None, *, min_step=5.0e-5, num_points=201):
+    """
+    Generate a robust continuous CDF with strict enforcement of minimum step size.
+    
+    Args:
+        percentile_values (dict): Dictionary mapping percentiles (1-99) to values
+        open_upper_bound (bool): Whether the upper bound is open
+        open_lower_bound (bool): Whether the lower bound is open
+        upper_bound (float): Maximum possible value
+        lower_bound (float): Minimum possible value
+        zero_point (float, optional): Reference point for non-linear scaling
+        min_step (float): Minimum step size between adjacent CDF points (default: 5.0e-5)
+        num_points (int): Number of points in the output CDF (default: 201)
     
-    return cdf_y.tolist()
+    Returns:
+        list: A list of CDF values with strictly enforced monotonicity and step size
+    """
+    if not percentile_values:
+        raise ValueError("Empty percentile values dictionary")
+    
+    return generate_continuous_cdfs(
+        [percentile_values], open_upper_bound, open_lower_bound, upper_bound, lower_bound,
+        zero_point, min_step=min_step, num_points=num_points
+    )[0].tolist()
 
 async def get_numeric_forecast(question_details: dict, write=print):
     today = datetime.datetime.now().strftime("%Y-%m-%d")
@@ -383,14 +460,22 @@ async def get_numeric_forecast(question_details: dict, write=print):
         )
         return txt, await call_gpt_o3(txt)
 
-    hist_prompt, hist_out = await format_call(NUMERIC_PROMPT_historical)
-    curr_prompt, curr_out = await format_call(NUMERIC_PROMPT_current)
+    # Shared by both context searches so overlapping queries, scrapes and summaries run once.
+    search_session = SearchSession()
+
+    async def gather_context(prompt, forecaster_id, label):
+        _, output = await format_call(prompt)
+        context = await process_search_queries(
+            output, forecaster_id=forecaster_id, question_details=question_details, search_session=search_session
+        )
+        write(f"{label} output: {output}\nContext: {context}")
+        return context
 
-    hist_context = await process_search_queries(hist_out, forecaster_id="-1", question_details=question_details)
-    curr_context = await process_search_queries(curr_out, forecaster_id="0", question_details=question_details)
+    hist_task = asyncio.create_task(gather_context(NUMERIC_PROMPT_historical, "-1", "Historical"))
+    curr_task = asyncio.create_task(gather_context(NUMERIC_PROMPT_current, "0", "Current"))
 
-    write(f"Historical output: {hist_out}\nContext: {hist_context}")
-    write(f"Current output: {curr_out}\nContext: {curr_context}")
+    # Step 1 only needs the historical context, so it starts while current search is still running.
+    hist_context = await hist_task
 
     prompt1 = NUMERIC_PROMPT_1.format(
         title=title, today=today, resolution_criteria=resolution,
@@ -399,53 +484,56 @@ async def get_numeric_forecast(question_details: dict, write=print):
         hint = f"The answer is expected to be above {lower} and below {upper}. Think carefully, and reconsider your sources, if your projections are outside this range."
     )
 
-    base_forecasts = await asyncio.gather(
-        call_claude(prompt1), call_claude(prompt1),
-        call_gpt_o4_mini(prompt1), call_gpt_o3(prompt1),
-        call_gpt_o3(prompt1)
-    )
-
-    for i, out in enumerate(base_forecasts):
-        write(f"\nForecaster_{i+1} step 1 output:\n{out}")
-
-
-    context_map = {
-        str(i+1): f"Current context: {curr_context}\nPrior: {base_forecasts[i]}"
-        for i in range(5)
-    }
-
-    prompts2 = [NUMERIC_PROMPT_2.format(
-        title=title, today=today, resolution_criteria=resolution,
-        fine_print=fine_print, context=context_map[str(i+1)],
-        units=unit, lower_bound_message="", upper_bound_message="",
-        hint = f"The answer is expected to be above {lower} and below {upper}. Think carefully, and reconsider your sources, if your projections are outside this range."
-    ) for i in range(5)]
+    step1_tasks = [
+        asyncio.create_task(call_claude(prompt1, sample_index=0)),
+        asyncio.create_task(call_claude(prompt1, sample_index=1)),
+        asyncio.create_task(call_gpt_o4_mini(prompt1)),
+        asyncio.create_task(call_gpt_o3(prompt1, sample_index=0)),
+        asyncio.create_task(call_gpt_o3(prompt1, sample_index=1)),
+    ]
+    step2_calls = [call_claude, call_claude, call_gpt_o4_mini, call_gpt_o3, call_gpt_o3]
+
+    async def run_forecaster(i):
+        # Forecaster i refines its own step-1 prior as soon as that prior is ready.
+        prior = await step1_tasks[i]
+        write(f"\nForecaster_{i+1} step 1 output:\n{prior}")
+        curr_context = await curr_task
+        prompt2 = NUMERIC_PROMPT_2.format(
+            title=title, today=today, resolution_criteria=resolution,
+            fine_print=fine_print, context=f"Current context: {curr_context}\nPrior: {prior}",
+            units=unit, lower_bound_message="", upper_bound_message="",
+            hint = f"The answer is expected to be above {lower} and below {upper}. Think carefully, and reconsider your sources, if your projections are outside this range."
+        )
+        with request_priority(PRIORITY_HIGH):
+            return await step2_calls[i](prompt2)
 
-    step2_outputs = await asyncio.gather(
-        call_claude(prompts2[0]), call_claude(prompts2[1]),
-        call_gpt_o4_mini(prompts2[2]), call_gpt_o3(prompts2[3]),
-        call_gpt_o3(prompts2[4])
-    )
+    step2_outputs = await asyncio.gather(*(run_forecaster(i) for i in range(5)))
 
-    all_cdfs = []
+    parsed_percentiles = []
+    parsed_ids = []
     final_outputs = []
 
     for i, output in enumerate(step2_outputs):
         try:
             parsed = extract_percentiles_from_response(output, verbose=True)
-            parsed = enforce_strict_increasing(parsed)
-            cdf = generate_continuous_cdf(parsed, open_upper, open_lower, upper, lower, zero)
-            all_cdfs.append((cdf, 2 if (i == 4 or i == 3) else 1))
+            parsed_percentiles.append(enforce_strict_increasing(parsed))
+            parsed_ids.append(i)
         except Exception as e:
             write(f"❌ Forecaster {i+1} failed: {e}")
         final_outputs.append(f"=== Forecaster {i+1} ===\n{output}\n")
 
-    if len(all_cdfs) < 3:
-        raise RuntimeError(f"🚨 Only {len(all_cdfs)} valid CDFs — need at least 3 to proceed")
+    cdf_errors = []
+    cdfs = generate_continuous_cdfs(parsed_percentiles, open_upper, open_lower, upper, lower, zero, errors=cdf_errors)
+    for row, e in cdf_errors:
+        write(f"❌ Forecaster {parsed_ids[row]+1} failed: {e}")
+
+    failed_rows = {row for row, _ in cdf_errors}
+    valid_rows = [row for row in range(len(parsed_ids)) if row not in failed_rows]
+    if len(valid_rows) < 3:
+        raise RuntimeError(f"🚨 Only {len(valid_rows)} valid CDFs — need at least 3 to proceed")
 
-    numer = sum(np.array(cdf) * weight for cdf, weight in all_cdfs)
-    denom = sum(weight for _, weight in all_cdfs)
-    combined = (numer / denom).tolist()
+    weights = np.array([2 if (parsed_ids[row] == 4 or parsed_ids[row] == 3) else 1 for row in valid_rows])
+    combined = ((cdfs[valid_rows] * weights[:, None]).sum(axis=0) / weights.sum()).tolist()
 
     if len(combined) != 201:
         raise RuntimeError(f"🚨 Combined CDF malformed: {len(combined)} points")
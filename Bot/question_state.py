@@ -0,0 +1,175 @@
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+from disk_cache import CACHE_DIR
+
+"""
+Local record of what the bot last forecast on each question, used to run the
+hourly tournament job incrementally. A question is forecast again only when it is
+new, its text or close time changed (fingerprint), or its last forecast is stale.
+News drift is approximated by the staleness windows, which tighten as the
+question approaches its close time.
+"""
+
+STALE_AFTER_HOURS = float(os.getenv("QUESTION_STALE_HOURS", "24"))
+CLOSING_WINDOW_HOURS = float(os.getenv("QUESTION_CLOSING_HOURS", "48"))
+CLOSING_STALE_AFTER_HOURS = float(os.getenv("QUESTION_CLOSING_STALE_HOURS", "6"))
+
+FINGERPRINT_FIELDS = (
+    "title",
+    "description",
+    "resolution_criteria",
+    "fine_print",
+    "scheduled_close_time",
+    "options",
+    "scaling",
+    "open_lower_bound",
+    "open_upper_bound",
+)
+
+
+def question_fingerprint(question_details: dict) -> str:
+    """Hash of the question fields that, when edited, warrant a new forecast."""
+    payload = json.dumps(
+        {field: question_details.get(field) for field in FINGERPRINT_FIELDS},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    """Metaculus returns either unix timestamps or ISO-8601 strings."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class QuestionStateStore:
+    def __init__(self, path: str = os.path.join(CACHE_DIR, "question_state.sqlite")):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            " question_id INTEGER PRIMARY KEY,"
+            " post_id INTEGER,"
+            " fingerprint TEXT NOT NULL,"
+            " last_forecast_at REAL NOT NULL,"
+            " forecast TEXT,"
+            " run_cost REAL,"
+            " seeded INTEGER NOT NULL DEFAULT 0)"
+        )
+
+    def get(self, question_id: int) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT question_id, post_id, fingerprint, last_forecast_at, forecast, run_cost, seeded"
+                " FROM questions WHERE question_id = ?",
+                (question_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "question_id": row[0],
+            "post_id": row[1],
+            "fingerprint": row[2],
+            "last_forecast_at": row[3],
+            "forecast": json.loads(row[4]) if row[4] is not None else None,
+            "run_cost": row[5],
+            "seeded": bool(row[6]),
+        }
+
+    def record_forecast(self, question_id: int, post_id: int, fingerprint: str, forecast: Any,
+                        run_cost: Optional[float] = None, forecast_time: Optional[float] = None,
+                        seeded: bool = False):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO questions"
+                " (question_id, post_id, fingerprint, last_forecast_at, forecast, run_cost, seeded)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    question_id,
+                    post_id,
+                    fingerprint,
+                    forecast_time if forecast_time is not None else time.time(),
+                    json.dumps(forecast, default=float),
+                    run_cost,
+                    int(seeded),
+                ),
+            )
+
+    def seed_from_metaculus(self, question_id: int, post_id: int, question_details: dict) -> Optional[dict]:
+        """
+        Records a forecast the bot made before this store existed, dated by its start
+        time on Metaculus. The current fingerprint is assumed to be what it saw.
+        """
+        try:
+            latest = question_details["my_forecasts"]["latest"]
+            forecast = latest["forecast_values"]
+        except (KeyError, TypeError):
+            return None
+        if forecast is None:
+            return None
+        self.record_forecast(
+            question_id,
+            post_id,
+            question_fingerprint(question_details),
+            forecast,
+            forecast_time=_parse_timestamp(latest.get("start_time")),
+            seeded=True,
+        )
+        return self.get(question_id)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def forecast_decision(question_details: dict, record: Optional[dict], now: Optional[float] = None) -> Tuple[bool, str]:
+    """
+    Scheduler policy: returns (should_forecast, reason) for one open question.
+    """
+    if record is None:
+        return True, "new question"
+    if record["fingerprint"] != question_fingerprint(question_details):
+        return True, "question text or close time changed"
+
+    now = time.time() if now is None else now
+    age_hours = (now - record["last_forecast_at"]) / 3600
+    close_time = _parse_timestamp(question_details.get("scheduled_close_time"))
+    if close_time is not None and (close_time - now) / 3600 <= CLOSING_WINDOW_HOURS:
+        if age_hours >= CLOSING_STALE_AFTER_HOURS:
+            return True, f"closing soon and last forecast is {age_hours:.1f}h old"
+    elif age_hours >= STALE_AFTER_HOURS:
+        return True, f"last forecast is {age_hours:.1f}h old"
+    return False, f"unchanged, last forecast {age_hours:.1f}h ago"
+
+
+_store: Optional[QuestionStateStore] = None
+
+
+def get_state_store() -> QuestionStateStore:
+    global _store
+    if _store is None:
+        _store = QuestionStateStore()
+    return _store
+
+
+def close_state_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
@@ -0,0 +1,196 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+"""
+Process-wide, provider-aware request scheduler.
+
+Every outbound call to a rate-limited provider waits for a slot from that provider's
+limiter, which enforces a concurrency cap plus token buckets on requests/min and
+(estimated) tokens/min. Waiters are served by priority, so the step-2 forecasts of a
+question are not starved by speculative article summaries from other questions.
+A 429 / Retry-After pauses the whole provider instead of each caller sleeping blindly.
+"""
+
+PRIORITY_HIGH = 0     # final (step-2) forecasts
+PRIORITY_NORMAL = 1   # default: context generation, step-1 forecasts, searches
+PRIORITY_LOW = 2      # article summaries and other speculative work
+
+# Defaults per provider; override with e.g. RATE_LIMIT_ANTHROPIC_RPM=100.
+# tpm=None disables the token bucket for providers that do not bill by token.
+PROVIDER_LIMITS = {
+    "anthropic": {"rpm": 50, "tpm": 400_000, "concurrency": 10},
+    "openai": {"rpm": 500, "tpm": 2_000_000, "concurrency": 20},
+    "perplexity": {"rpm": 20, "tpm": None, "concurrency": 5},
+    "serper": {"rpm": 300, "tpm": None, "concurrency": 20},
+    "brightdata": {"rpm": 600, "tpm": None, "concurrency": 50},
+    "asknews": {"rpm": 60, "tpm": None, "concurrency": 5},
+}
+
+MAX_RETRY_AFTER = 120  # seconds
+
+_request_priority: ContextVar[int] = ContextVar("request_priority", default=PRIORITY_NORMAL)
+
+
+def _limit_from_env(provider: str, key: str, default):
+    value = os.getenv(f"RATE_LIMIT_{provider.upper()}_{key.upper()}")
+    if value is None:
+        return default
+    return None if value.lower() == "none" else int(value)
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second up to `per_minute`."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Corrects a previous estimate; the bucket may go into debt."""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class ProviderLimiter:
+    def __init__(self, name: str, rpm: Optional[int], tpm: Optional[int], concurrency: int):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._waiters = []  # heap of (priority, seq, tokens, future)
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL, tokens: int = 0):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # granted just before the cancellation landed
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def penalize(self, delay: float):
+        """Pauses the provider for `delay` seconds (e.g. after a 429 with Retry-After)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + min(delay, MAX_RETRY_AFTER))
+        self._dispatch()
+
+    def record_tokens(self, estimated: int, actual: Optional[int]):
+        if self.tokens is not None and actual is not None:
+            self.tokens.adjust(actual - estimated)
+
+    def _dispatch(self):
+        """Grants slots to the highest-priority waiters while limits allow."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiters:
+            priority, _, tokens, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self.concurrency:
+                return  # release() dispatches again
+            now = time.monotonic()
+            delay = max(
+                self.blocked_until - now,
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(tokens, now) if self.tokens and tokens else 0.0,
+            )
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._waiters)
+            if self.requests:
+                self.requests.consume(1, now)
+            if self.tokens and tokens:
+                self.tokens.consume(tokens, now)
+            self.in_flight += 1
+            future.set_result(None)
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limits = PROVIDER_LIMITS[provider]
+        limiter = ProviderLimiter(
+            provider,
+            rpm=_limit_from_env(provider, "rpm", limits["rpm"]),
+            tpm=_limit_from_env(provider, "tpm", limits["tpm"]),
+            concurrency=_limit_from_env(provider, "concurrency", limits["concurrency"]),
+        )
+        _limiters[provider] = limiter
+    return limiter
+
+
+@contextlib.contextmanager
+def request_priority(priority: int):
+    """Sets the priority of every rate-limited call made inside the block (and its child tasks)."""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+@contextlib.asynccontextmanager
+async def rate_limited(provider: str, tokens: int = 0, priority: Optional[int] = None):
+    """
+    Holds one request slot of `provider` for the duration of the block. `tokens` is
+    the estimated token cost charged against the provider's tokens/min bucket.
+    """
+    limiter = get_limiter(provider)
+    await limiter.acquire(_request_priority.get() if priority is None else priority, tokens)
+    try:
+        yield limiter
+    finally:
+        limiter.release()
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def retry_after_seconds(headers, default: float) -> float:
+    """Reads a Retry-After (seconds) header, falling back to `default`."""
+    value = headers.get("Retry-After") if headers else None
+    try:
+        return min(float(value), MAX_RETRY_AFTER) if value is not None else default
+    except ValueError:
+        return default
+
+
+def penalize(provider: str, delay: float):
+    get_limiter(provider).penalize(delay)
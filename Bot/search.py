@@ -7,19 +7,30 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from FastContentExtractor import FastContentExtractor
 from prompts import INITIAL_SEARCH_PROMPT, CONTINUATION_SEARCH_PROMPT
-import dateparser
+import datetime
+import hashlib
+import date_utils
+from date_utils import format_date
 from dotenv import load_dotenv
 import json
 import os
-from aiohttp import ClientSession, ClientTimeout
-from asknews_sdk import AskNewsSDK
+from aiohttp import ClientTimeout
+from asknews_sdk import AsyncAskNewsSDK
 from prompts import context
 from dotenv import load_dotenv
 import aiohttp
 import re
 import random
 import time
-from openai import OpenAI   
+from llm_calls import create_response
+from http_session import get_session
+import llm_cache
+from llm_cache import LLMCacheMiss, cached_completion, get_summary_cache, summary_cache_key
+from metrics import cost_scope, observe_latency, record_metric, record_usage, usage_cost
+from rate_limiter import PRIORITY_LOW, estimate_tokens, rate_limited, request_priority, retry_after_seconds
+from search_session import SearchSession, normalize_query
+from disk_cache import DiskCache
+from article_ranker import ArticleSelector, rank_articles
 import traceback
 load_dotenv()
 
@@ -30,7 +41,33 @@ PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 METACULUS_TOKEN = os.getenv("METACULUS_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Budgets of agentic_search; a search stops early once any of them is reached
+AGENTIC_MAX_STEPS = int(os.getenv("AGENTIC_MAX_STEPS", "7"))
+AGENTIC_BUDGET_USD = float(os.getenv("AGENTIC_BUDGET_USD", "0.50"))  # per agentic search
+AGENTIC_QUESTION_BUDGET_USD = float(os.getenv("AGENTIC_QUESTION_BUDGET_USD", "2.00"))  # all agentic searches of a question
+AGENTIC_MAX_TOKENS = int(os.getenv("AGENTIC_MAX_TOKENS", "400000"))  # per agentic search, input + output
+AGENTIC_MAX_PROMPT_TOKENS = int(os.getenv("AGENTIC_MAX_PROMPT_TOKENS", "40000"))  # per LLM call
+AGENTIC_TIME_BUDGET = float(os.getenv("AGENTIC_TIME_BUDGET_SECONDS", "300"))
+AGENTIC_MODEL = "o3"
+
+ASKNEWS_TIMEOUT = 60  # seconds
+ASKNEWS_CACHE_TTL = float(os.getenv("ASKNEWS_CACHE_TTL_MINUTES", "60")) * 60
+ASKNEWS_CACHE_MAX_BYTES = int(float(os.getenv("ASKNEWS_CACHE_MAX_MB", "32")) * 1024 * 1024)
+
+_asknews_client = None
+_asknews_cache = None
+_asknews_inflight: Dict[str, asyncio.Future] = {}
+
+PERPLEXITY_MODEL = "sonar-deep-research"
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_ASYNC_URL = "https://api.perplexity.ai/async/chat/completions"
+PERPLEXITY_JOB_MODE = os.getenv("PERPLEXITY_JOB_MODE", "true").lower() != "false"
+PERPLEXITY_POLL_INTERVAL = 15  # seconds
+PERPLEXITY_JOB_TIMEOUT = 1800  # seconds
+PERPLEXITY_CACHE_TTL = float(os.getenv("PERPLEXITY_CACHE_TTL_HOURS", "24")) * 3600
+PERPLEXITY_CACHE_MAX_BYTES = int(float(os.getenv("PERPLEXITY_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+_perplexity_cache = None
 
 assistant_prompt = """
 
@@ -66,20 +103,28 @@ def write(x):
     print(x)
 
 def parse_date(date_str: str) -> str:
-    parsed_date = dateparser.parse(date_str, settings={'STRICT_PARSING': False})
-    if parsed_date:
-        return parsed_date.strftime("%b %d, %Y")
-    return "Unknown"
+    return format_date(date_utils.parse_date(date_str))
 
 def validate_time(before_date_str, source_date_str):
-    if source_date_str == "Unknown":
+    before_date = date_utils.parse_date(before_date_str)
+    source_date = date_utils.parse_date(source_date_str)
+    if source_date is None or before_date is None:
         return False
-    before_date = dateparser.parse(before_date_str)
-    source_date = dateparser.parse(source_date_str)
     return source_date <= before_date
 
+SUMMARY_MODEL = "o3"
+
 # new helper: takes raw article text + the question_details dict
 async def summarize_article(article: str, question_details: dict) -> str:
+    # The same article for the same question is summarized once, not on every run
+    use_cache = llm_cache.LLM_CACHE_MODE != "off"
+    key = summary_cache_key(article, question_details, SUMMARY_MODEL)
+    if use_cache:
+        entry = get_summary_cache().get_json(key)
+        if entry is not None:
+            write("[summarize_article] ♻️ Summary cache hit")
+            return entry["summary"]
+
     prompt = assistant_prompt.format(
         title=question_details["title"],
         resolution_criteria=question_details["resolution_criteria"],
@@ -87,62 +132,115 @@ async def summarize_article(article: str, question_details: dict) -> str:
         background=question_details["description"],
         article=article
     )
-    return await call_gpt(prompt)
+    if llm_cache.LLM_CACHE_MODE == "replay":
+        raise LLMCacheMiss("No cached article summary in replay mode")
+    # Called directly rather than through call_gpt, so the summary is stored only in
+    # the summary cache and not a second time in the LLM response cache.
+    # Summaries are speculative work: let forecasting calls go first
+    try:
+        with request_priority(PRIORITY_LOW):
+            summary = await _call_o3(prompt)
+    except Exception as e:
+        write(f"[summarize_article] Error: {str(e)}")
+        return f"Error calling OpenAI API: {str(e)}"
+    if use_cache and summary:
+        get_summary_cache().set_json(key, {"model": SUMMARY_MODEL, "summary": summary})
+    return summary
 
 
-async def call_asknews(question: str) -> str:
+def get_asknews_client() -> AsyncAskNewsSDK:
     """
-    Use the AskNews `news` endpoint to get news context for your query.
-    The full API reference can be found here: https://docs.asknews.app/en/reference#get-/v1/news/search
+    Returns the process-wide AskNews client. Its OAuth token is fetched once and
+    reused until it expires, instead of one token exchange per search.
     """
-    try:
-        ask = AskNewsSDK(
-            client_id=ASKNEWS_CLIENT_ID, client_secret=ASKNEWS_SECRET, scopes=set(["news"])
+    global _asknews_client
+    if _asknews_client is None:
+        _asknews_client = AsyncAskNewsSDK(
+            client_id=ASKNEWS_CLIENT_ID, client_secret=ASKNEWS_SECRET, scopes={"news"}, timeout=ASKNEWS_TIMEOUT
         )
+    return _asknews_client
 
-        async with aiohttp.ClientSession() as session:
-            # Create tasks for both API calls
-            hot_task = asyncio.create_task(asyncio.to_thread(ask.news.search_news,
-                query=question,
-                n_articles=8,
-                return_type="both",
-                strategy="latest news"
-            ))
-            historical_task = asyncio.create_task(asyncio.to_thread(ask.news.search_news,
-                query=question,
-                n_articles=8,
-                return_type="both",
-                strategy="news knowledge"
-            ))
-
-            # Wait for both tasks to complete
-            hot_response, historical_response = await asyncio.gather(hot_task, historical_task)
-
-        hot_articles = hot_response.as_dicts
-        historical_articles = historical_response.as_dicts
-        formatted_articles = "Here are the relevant news articles:\n\n"
 
-        if hot_articles:
-            hot_articles = [article.__dict__ for article in hot_articles]
-            hot_articles = sorted(hot_articles, key=lambda x: x["pub_date"], reverse=True)
+async def close_asknews_client():
+    global _asknews_client
+    if _asknews_client is not None:
+        await _asknews_client.close()
+        _asknews_client = None
 
-            for article in hot_articles:
-                pub_date = article["pub_date"].strftime("%B %d, %Y %I:%M %p")
-                formatted_articles += f"**{article['eng_title']}**\n{article['summary']}\nOriginal language: {article['language']}\nPublish date: {pub_date}\nSource:[{article['source_id']}]({article['article_url']})\n\n"
 
-        if historical_articles:
-            historical_articles = [article.__dict__ for article in historical_articles]
-            historical_articles = sorted(
-                historical_articles, key=lambda x: x["pub_date"], reverse=True
-            )
+def get_asknews_cache() -> DiskCache:
+    global _asknews_cache
+    if _asknews_cache is None:
+        _asknews_cache = DiskCache("asknews", ttl=ASKNEWS_CACHE_TTL, max_bytes=ASKNEWS_CACHE_MAX_BYTES, compress=True)
+    return _asknews_cache
+
+
+async def _fetch_asknews(query: str, strategy: str, key: str) -> List[Dict]:
+    async with rate_limited("asknews"):
+        response = await get_asknews_client().news.search_news(
+            query=query,
+            n_articles=8,
+            return_type="both",
+            strategy=strategy
+        )
+    articles = [
+        {
+            "eng_title": article.eng_title,
+            "summary": article.summary,
+            "language": article.language,
+            "pub_date": article.pub_date.isoformat(),
+            "source_id": article.source_id,
+            "article_url": str(article.article_url),
+        }
+        for article in response.as_dicts
+    ]
+    get_asknews_cache().set_json(key, articles)
+    return articles
+
+
+async def search_asknews(query: str, strategy: str) -> List[Dict]:
+    """
+    AskNews search results for (query, strategy), served from a disk cache for
+    ASKNEWS_CACHE_TTL_MINUTES; concurrent identical searches share one request.
+    """
+    key = f"{strategy}:{normalize_query(query)}"
+    articles = get_asknews_cache().get_json(key)
+    if articles is not None:
+        write(f"[call_asknews] ♻️ Cache hit for '{query}' ({strategy})")
+        return articles
+
+    task = _asknews_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_asknews(query, strategy, key))
+        _asknews_inflight[key] = task
+        task.add_done_callback(lambda _: _asknews_inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def format_asknews_articles(articles: List[Dict]) -> str:
+    formatted = ""
+    for article in sorted(articles, key=lambda x: x["pub_date"], reverse=True):
+        pub_date = datetime.datetime.fromisoformat(article["pub_date"]).strftime("%B %d, %Y %I:%M %p")
+        formatted += f"**{article['eng_title']}**\n{article['summary']}\nOriginal language: {article['language']}\nPublish date: {pub_date}\nSource:[{article['source_id']}]({article['article_url']})\n\n"
+    return formatted
 
-            for article in historical_articles:
-                pub_date = article["pub_date"].strftime("%B %d, %Y %I:%M %p")
-                formatted_articles += f"**{article['eng_title']}**\n{article['summary']}\nOriginal language: {article['language']}\nPublish date: {pub_date}\nSource:[{article['source_id']}]({article['article_url']})\n\n"
+
+async def call_asknews(question: str) -> str:
+    """
+    Use the AskNews `news` endpoint to get news context for your query.
+    The full API reference can be found here: https://docs.asknews.app/en/reference#get-/v1/news/search
+    """
+    try:
+        hot_articles, historical_articles = await asyncio.gather(
+            search_asknews(question, "latest news"),
+            search_asknews(question, "news knowledge"),
+        )
+        formatted_articles = "Here are the relevant news articles:\n\n"
+        formatted_articles += format_asknews_articles(hot_articles)
+        formatted_articles += format_asknews_articles(historical_articles)
 
         if not hot_articles and not historical_articles:
             formatted_articles += "No articles were found.\n\n"
-            return formatted_articles
 
         return formatted_articles
     except Exception as e:
@@ -150,9 +248,37 @@ async def call_asknews(question: str) -> str:
         return f"Error retrieving news articles: {str(e)}"
     
 
+def _agentic_budget_exhausted(search_tracker, started, next_prompt, step_output_tokens):
+    """
+    Returns the reason to stop before the next step, or None. The next step is
+    priced from its prompt plus the average output of the previous steps.
+    """
+    elapsed = time.monotonic() - started
+    if elapsed >= AGENTIC_TIME_BUDGET:
+        return f"time budget reached ({elapsed:.0f}s)"
+    expected_output = sum(step_output_tokens) / len(step_output_tokens) if step_output_tokens else 0
+    expected_input = estimate_tokens(next_prompt)
+    used_tokens = search_tracker.input_tokens + search_tracker.output_tokens
+    if used_tokens + expected_input + expected_output > AGENTIC_MAX_TOKENS:
+        return f"token budget reached ({used_tokens:,} used)"
+    expected_usd = usage_cost(AGENTIC_MODEL, expected_input, int(expected_output))
+    if search_tracker.usd + expected_usd > AGENTIC_BUDGET_USD:
+        return f"budget reached (${search_tracker.usd:.4f} spent)"
+    question_tracker = search_tracker.parent
+    if question_tracker is not None:
+        question_spend = question_tracker.total("agentic_step", "usd")
+        if question_spend + expected_usd > AGENTIC_QUESTION_BUDGET_USD:
+            return f"question budget reached (${question_spend:.4f} spent on agentic search)"
+    return None
+
+
 async def agentic_search(query: str) -> str:
     """
     Performs agentic search using GPT to iteratively research and analyze a query.
+    Stops early once the dollar, token or time budget (AGENTIC_*) would be exceeded,
+    returning the analysis so far plus any search results it had no budget left to
+    analyze; when the budget is already spent, no step is run at all. Pages the
+    agent has already read are not sent to it again.
     
     Args:
         query: The search query to research
@@ -162,157 +288,270 @@ async def agentic_search(query: str) -> str:
     """
     write(f"[agentic_search] Starting research for query: {query}")
     
-    max_steps = 7
+    max_steps = AGENTIC_MAX_STEPS
     current_analysis = ""
     all_search_queries = []  # Track all queries used
-    
-    # Cost tracking variables
-    total_input_tokens = 0
-    total_output_tokens = 0
-    
-    def estimate_tokens(text: str) -> int:
-        """Estimate token count using ~4 characters per token rule for GPT models"""
-        return max(1, len(text) // 4)
-    
-    def calculate_cost(input_tokens: int, output_tokens: int) -> float:
-        """Calculate cost based on token usage"""
-        input_cost = (input_tokens / 1_000_000) * 1.100  # $1.100 per 1M input tokens
-        output_cost = (output_tokens / 1_000_000) * 4.400  # $4.400 per 1M output tokens
-        return input_cost + output_cost
-    
-    for step in range(max_steps):
-        try:
-            # Prepare the prompt
-            if step == 0:
-                prompt = INITIAL_SEARCH_PROMPT.format(query=query)
-            else:
-                # Build previous section
-                if current_analysis:
-                    previous_section = f"Your previous analysis:\n{current_analysis}\n\nPrevious search queries used: {', '.join(all_search_queries)}\n"
+    seen_urls = set()  # Pages already folded into current_analysis
+    step_output_tokens = []
+    started = time.monotonic()
+    stop_reason = None
+    search_results = ""  # results of the last searches, until a step has analyzed them
+
+    with cost_scope() as search_tracker:
+        for step in range(max_steps):
+            try:
+                # Prepare the prompt
+                if step == 0:
+                    prompt = INITIAL_SEARCH_PROMPT.format(query=query)
                 else:
-                    previous_section = f"Previous search queries used: {', '.join(all_search_queries)}\n"
+                    # Build previous section
+                    if current_analysis:
+                        previous_section = f"Your previous analysis:\n{current_analysis}\n\nPrevious search queries used: {', '.join(all_search_queries)}\n"
+                    else:
+                        previous_section = f"Previous search queries used: {', '.join(all_search_queries)}\n"
+                    
+                    prompt = CONTINUATION_SEARCH_PROMPT.format(
+                        query=query,
+                        previous_section=previous_section,
+                        search_results=search_results
+                    )
+
+                reason = _agentic_budget_exhausted(search_tracker, started, prompt, step_output_tokens)
+                if reason:
+                    stop_reason = reason
+                    write(f"[agentic_search] Stopping before step {step + 1}: {stop_reason}")
+                    break
                 
-                prompt = CONTINUATION_SEARCH_PROMPT.format(
+                # Call GPT for analysis and search queries, measuring the real usage of the step
+                write(f"[agentic_search] Step {step + 1}: Calling GPT")
+                step_started = time.monotonic()
+                with cost_scope() as step_tracker:
+                    response = await call_gpt(prompt, step)
+                step_output_tokens.append(step_tracker.output_tokens)
+                record_metric(
+                    "agentic_step",
                     query=query,
-                    previous_section=previous_section,
-                    search_results=search_results
+                    step=step + 1,
+                    prompt_chars=len(prompt),
+                    input_tokens=step_tracker.input_tokens,
+                    output_tokens=step_tracker.output_tokens,
+                    usd=step_tracker.usd,
+                    seconds=time.monotonic() - step_started,
                 )
-            
-            # Track input tokens
-            prompt_tokens = estimate_tokens(prompt)
-            total_input_tokens += prompt_tokens
-            
-            # Call GPT for analysis and search queries
-            write(f"[agentic_search] Step {step + 1}: Calling GPT")
-            response = await call_gpt(prompt, step)
-            
-            # Track output tokens
-            response_tokens = estimate_tokens(response)
-            total_output_tokens += response_tokens
-            
-            # Parse the response
-            analysis_match = re.search(r'Analysis:\s*(.*?)(?=Search queries:|$)', response, re.DOTALL)
-            if not analysis_match:
-                write(f"[agentic_search] Error: Could not parse analysis from response")
-                return f"Error: Failed to parse analysis at step {step + 1}"
-            
-            # Only update current_analysis after the first search (step > 0)
-            if step > 0:
-                current_analysis = analysis_match.group(1).strip()
-                write(f"[agentic_search] Step {step + 1}: Analysis updated ({len(current_analysis)} chars)")
-            else:
-                write(f"[agentic_search] Step 1: Initial query understanding complete")
-            
-            # Check for search queries
-            search_queries_match = re.search(r'Search queries:\s*(.*)', response, re.DOTALL)
-            
-            # For the initial step, we expect search queries
-            if step == 0 and not search_queries_match:
-                write(f"[agentic_search] Error: No search queries in initial response")
-                return "Error: Failed to generate initial search queries"
-            
-            if not search_queries_match or step == max_steps - 1:
-                # No more searches needed or reached max steps
-                if step > 0:  # Only break if we have an analysis
-                    write(f"[agentic_search] Research complete at step {step + 1}")
-                    break
-            
-            # Extract search queries with sources
-            queries_text = search_queries_match.group(1).strip()
-            # Parse format: X. [Query] (Source)
-            search_queries_with_source = re.findall(r'\d+\.\s*([^(]+?)\s*\((Google|Google News)\)', queries_text)
-            
-            if not search_queries_with_source:
-                if step == 0:
-                    write(f"[agentic_search] Error: No valid search queries in initial response")
-                    return "Error: Failed to parse initial search queries"
+                write(
+                    f"[agentic_search] Step {step + 1}: {step_tracker.input_tokens:,} in / "
+                    f"{step_tracker.output_tokens:,} out tokens, ${step_tracker.usd:.4f}"
+                )
+                
+                # Parse the response
+                analysis_match = re.search(r'Analysis:\s*(.*?)(?=Search queries:|$)', response, re.DOTALL)
+                if not analysis_match:
+                    write(f"[agentic_search] Error: Could not parse analysis from response")
+                    return f"Error: Failed to parse analysis at step {step + 1}"
+                
+                # Only update current_analysis after the first search (step > 0)
+                if step > 0:
+                    current_analysis = analysis_match.group(1).strip()
+                    search_results = ""
+                    write(f"[agentic_search] Step {step + 1}: Analysis updated ({len(current_analysis)} chars)")
                 else:
-                    write(f"[agentic_search] No new search queries, completing research")
-                    break
-            
-            # Limit to 5 queries and clean them up
-            search_queries_with_source = [(q.strip(), source) for q, source in search_queries_with_source[:5]]
-            
-            write(f"[agentic_search] Step {step + 1}: Found {len(search_queries_with_source)} search queries")
-            # Track just the queries for deduplication
-            all_search_queries.extend([q for q, _ in search_queries_with_source])
-            
-            # Execute searches in parallel
-            search_tasks = []
-            for sq, source in search_queries_with_source:
-                write(f"[agentic_search] Searching: {sq} (Source: {source})")
-                search_tasks.append(
-                    google_search_agentic(
-                        sq,
-                        is_news=(source == "Google News")
+                    write(f"[agentic_search] Step 1: Initial query understanding complete")
+                
+                # Check for search queries
+                search_queries_match = re.search(r'Search queries:\s*(.*)', response, re.DOTALL)
+                
+                # For the initial step, we expect search queries
+                if step == 0 and not search_queries_match:
+                    write(f"[agentic_search] Error: No search queries in initial response")
+                    return "Error: Failed to generate initial search queries"
+                
+                if not search_queries_match or step == max_steps - 1:
+                    # No more searches needed or reached max steps
+                    if step > 0:  # Only break if we have an analysis
+                        write(f"[agentic_search] Research complete at step {step + 1}")
+                        break
+                
+                # Extract search queries with sources
+                queries_text = search_queries_match.group(1).strip()
+                # Parse format: X. [Query] (Source)
+                search_queries_with_source = re.findall(r'\d+\.\s*([^(]+?)\s*\((Google|Google News)\)', queries_text)
+                
+                if not search_queries_with_source:
+                    if step == 0:
+                        write(f"[agentic_search] Error: No valid search queries in initial response")
+                        return "Error: Failed to parse initial search queries"
+                    else:
+                        write(f"[agentic_search] No new search queries, completing research")
+                        break
+                
+                # Limit to 5 queries and clean them up
+                search_queries_with_source = [(q.strip(), source) for q, source in search_queries_with_source[:5]]
+                
+                write(f"[agentic_search] Step {step + 1}: Found {len(search_queries_with_source)} search queries")
+                # Track just the queries for deduplication
+                all_search_queries.extend([q for q, _ in search_queries_with_source])
+
+                # Keep the next prompt within the per-call budget: split the room left
+                # after the analysis across the pages the searches may return
+                room_chars = (AGENTIC_MAX_PROMPT_TOKENS - estimate_tokens(prompt_overhead(query, current_analysis, all_search_queries))) * 4
+                max_page_chars = max(1000, min(8000, room_chars // (3 * len(search_queries_with_source))))
+                
+                # Execute searches in parallel
+                search_tasks = []
+                for sq, source in search_queries_with_source:
+                    write(f"[agentic_search] Searching: {sq} (Source: {source})")
+                    search_tasks.append(
+                        google_search_agentic(
+                            sq,
+                            is_news=(source == "Google News"),
+                            seen_urls=seen_urls,
+                            max_page_chars=max_page_chars
+                        )
                     )
-                )
-            
-            # Gather search results
-            search_results_list = await asyncio.gather(*search_tasks, return_exceptions=True)
-            
-            # Format search results
-            search_results = ""
-            for (sq, source), result in zip(search_queries_with_source, search_results_list):
-                if isinstance(result, Exception):
-                    search_results += f"\nSearch query: {sq} (Source: {source})\nError: {str(result)}\n"
+                
+                # Gather search results
+                search_results_list = await asyncio.gather(*search_tasks, return_exceptions=True)
+                
+                # Format search results
+                search_results = ""
+                for (sq, source), result in zip(search_queries_with_source, search_results_list):
+                    if isinstance(result, Exception):
+                        search_results += f"\nSearch query: {sq} (Source: {source})\nError: {str(result)}\n"
+                    else:
+                        search_results += f"\nSearch query: {sq} (Source: {source})\n{result}\n"
+                
+                write(f"[agentic_search] Step {step + 1}: Search complete, {len(search_results)} chars of results")
+                
+            except Exception as e:
+                write(f"[agentic_search] Error at step {step + 1}: {str(e)}")
+                if current_analysis or search_results:
+                    # Return what we have so far
+                    break
                 else:
-                    search_results += f"\nSearch query: {sq} (Source: {source})\n{result}\n"
-            
-            write(f"[agentic_search] Step {step + 1}: Search complete, {len(search_results)} chars of results")
-            
-        except Exception as e:
-            write(f"[agentic_search] Error at step {step + 1}: {str(e)}")
-            if current_analysis:
-                # Return what we have so far
-                break
-            else:
-                return f"Error during agentic search: {str(e)}"
+                    return f"Error during agentic search: {str(e)}"
     
     # Print summary statistics
-    steps_used = step + 1
-    total_cost = calculate_cost(total_input_tokens, total_output_tokens)
+    steps_used = len(step_output_tokens)
     
     print(f"\n🔍 Agentic Search Summary:")
-    print(f"   Steps used: {steps_used}")
-    print(f"   Total tokens: {total_input_tokens + total_output_tokens:,} ({total_input_tokens:,} input + {total_output_tokens:,} output)")
-    print(f"   Estimated cost: ${total_cost:.4f}")
+    print(f"   Steps used: {steps_used}" + (f" (stopped early: {stop_reason})" if stop_reason else ""))
+    print(f"   Total tokens: {search_tracker.input_tokens + search_tracker.output_tokens:,} ({search_tracker.input_tokens:,} input + {search_tracker.output_tokens:,} output)")
+    print(f"   Cost: ${search_tracker.usd:.4f} in {time.monotonic() - started:.0f}s")
     
+    if search_results:
+        # Searches already paid for but never analyzed are still useful context
+        note = f"Search results not analyzed ({stop_reason or 'research stopped'}):\n{search_results}"
+        return f"{current_analysis}\n\n{note}" if current_analysis else note
+
     # Ensure we have an analysis to return
     if not current_analysis:
+        if stop_reason:
+            return f"Agentic search skipped: {stop_reason}"
         return "Error: No analysis was generated during the research process"
     
     return current_analysis
 
 
+def prompt_overhead(query, current_analysis, all_search_queries):
+    """The continuation prompt of agentic_search without its search results."""
+    previous_section = f"Your previous analysis:\n{current_analysis}\n\nPrevious search queries used: {', '.join(all_search_queries)}\n"
+    return CONTINUATION_SEARCH_PROMPT.format(query=query, previous_section=previous_section, search_results="")
+
+
+class PerplexityError(RuntimeError):
+    pass
+
+
+def get_perplexity_cache() -> DiskCache:
+    global _perplexity_cache
+    if _perplexity_cache is None:
+        _perplexity_cache = DiskCache(
+            "perplexity", ttl=PERPLEXITY_CACHE_TTL, max_bytes=PERPLEXITY_CACHE_MAX_BYTES, compress=True
+        )
+    return _perplexity_cache
+
+
+def perplexity_cache_key(prompt: str) -> str:
+    normalized = " ".join(prompt.lower().split())
+    return f"{PERPLEXITY_MODEL}:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _perplexity_headers() -> dict:
+    return {
+        "accept": "application/json",
+        "content-type": "application/json",
+        "authorization": f"Bearer {PERPLEXITY_API_KEY}"
+    }
+
+
+def _perplexity_content(data: dict) -> str:
+    usage = data.get("usage") or {}
+    record_usage(PERPLEXITY_MODEL, usage.get("prompt_tokens"), usage.get("completion_tokens"))
+    content = data['choices'][0]['message']['content']
+    content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL)
+    return content.strip()
+
+
+async def _perplexity_request(method: str, url: str, payload: dict = None, timeout: float = 60,
+                              penalty: float = 10) -> dict:
+    """One rate-limited request to the Perplexity API; raises PerplexityError on an error status."""
+    session = get_session("perplexity")
+    async with rate_limited("perplexity") as limiter, \
+            session.request(method, url, json=payload, headers=_perplexity_headers(),
+                            timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        if response.status == 429:
+            limiter.penalize(retry_after_seconds(response.headers, penalty))
+        if response.status != 200:
+            raise PerplexityError(f"HTTP {response.status}: {await response.text()}")
+        return await response.json()
+
+
+async def _perplexity_job(payload: dict, key: str) -> str:
+    """
+    Submits the request as an async job, or resumes the job an earlier call or run
+    submitted for the same prompt, and polls it until it completes. The rate-limiter
+    slot is only held for each submit/poll request, not for the whole research.
+    """
+    cache = get_perplexity_cache()
+    job = cache.get_json(f"job:{key}")
+    if job is None:
+        data = await _perplexity_request("POST", PERPLEXITY_ASYNC_URL, {"request": payload})
+        job = {"id": data["id"]}
+        cache.set_json(f"job:{key}", job, ttl=PERPLEXITY_JOB_TIMEOUT)
+        write(f"[Perplexity API] 📨 Submitted job {job['id']}")
+    else:
+        write(f"[Perplexity API] ♻️ Resuming job {job['id']}")
+
+    deadline = time.monotonic() + PERPLEXITY_JOB_TIMEOUT
+    while time.monotonic() < deadline:
+        data = await _perplexity_request("GET", f"{PERPLEXITY_ASYNC_URL}/{job['id']}")
+        status = data.get("status")
+        if status == "COMPLETED":
+            cache.delete(f"job:{key}")
+            return _perplexity_content(data["response"])
+        if status == "FAILED":
+            cache.delete(f"job:{key}")
+            raise PerplexityError(f"Job {job['id']} failed: {data.get('error_message')}")
+        await asyncio.sleep(PERPLEXITY_POLL_INTERVAL)
+    raise asyncio.TimeoutError(f"Job {job['id']} still running after {PERPLEXITY_JOB_TIMEOUT}s")
+
+
 async def call_perplexity(prompt: str) -> str:
     """
     Async function to call Perplexity API for deep research
-    Includes retry logic and proper timeout handling
+    Includes retry logic and proper timeout handling. Answers are cached by
+    normalized prompt for PERPLEXITY_CACHE_TTL_HOURS; with PERPLEXITY_JOB_MODE the
+    research runs as a submitted job that is polled, and a job still running is
+    resumed by a later call for the same prompt.
     """
-    url = "https://api.perplexity.ai/chat/completions"
+    key = perplexity_cache_key(prompt)
+    cached = get_perplexity_cache().get_json(key)
+    if cached is not None:
+        write(f"[Perplexity API] ♻️ Cache hit for query: {prompt[:50]}...")
+        return cached["content"]
+
     payload = {
-        "model": "sonar-deep-research",
+        "model": PERPLEXITY_MODEL,
         "messages": [
             {
                 "role": "system",
@@ -324,33 +563,27 @@ async def call_perplexity(prompt: str) -> str:
             }
         ]
     }
-    headers = {
-        "accept": "application/json",
-        "content-type": "application/json",
-        "authorization": f"Bearer {PERPLEXITY_API_KEY}"
-    }
 
     max_retries = 3
     backoff_base = 3  # seconds to wait between retries
 
     for attempt in range(1, max_retries + 1):
+        write(f"[Perplexity API] Attempt {attempt} for query: {prompt[:50]}...")
+        started = time.monotonic()
         try:
-            write(f"[Perplexity API] Attempt {attempt} for query: {prompt[:50]}...")
-            async with aiohttp.ClientSession() as session:
-                timeout = aiohttp.ClientTimeout(total=800)  # 800 seconds timeout
-                async with session.post(url, json=payload, headers=headers, timeout=timeout) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        content = data['choices'][0]['message']['content']
-                        content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL)
-                        write(f"[Perplexity API] ✅ Success on attempt {attempt}")
-                        return content.strip()
-                    else:
-                        response_text = await response.text()
-                        write(f"[Perplexity API] ❌ Error: HTTP {response.status}: {response_text}")
-                        # Continue to retry on non-200 response
-                        
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if PERPLEXITY_JOB_MODE:
+                content = await _perplexity_job(payload, key)
+            else:
+                data = await _perplexity_request(
+                    "POST", PERPLEXITY_URL, payload, timeout=800, penalty=backoff_base * attempt
+                )
+                content = _perplexity_content(data)
+            observe_latency("perplexity:ok", time.monotonic() - started)
+            get_perplexity_cache().set_json(key, {"content": content})
+            write(f"[Perplexity API] ✅ Success on attempt {attempt}")
+            return content
+        except (aiohttp.ClientError, asyncio.TimeoutError, PerplexityError, KeyError) as e:
+            observe_latency("perplexity:error", time.monotonic() - started)
             write(f"[Perplexity API] ⚠️ Attempt {attempt} failed: {e}")
         
         # Only enter retry logic if not on last attempt
@@ -358,12 +591,10 @@ async def call_perplexity(prompt: str) -> str:
             wait_time = backoff_base * attempt
             write(f"[Perplexity API] 🔁 Retrying in {wait_time} seconds...")
             await asyncio.sleep(wait_time)
-        else:
-            write(f"[Perplexity API] ❌ Max retries ({max_retries}) reached. Giving up.")
-            return f"Error: Perplexity API failed after {max_retries} attempts. The system will continue with other available data."
 
-    # Should never reach here
-    return "Unexpected error in call_perplexity"
+    write(f"[Perplexity API] ❌ Max retries ({max_retries}) reached. Giving up.")
+    return f"Error: Perplexity API failed after {max_retries} attempts. The system will continue with other available data."
+
 
 async def google_search(query, is_news=False, date_before=None):
     original_query = query
@@ -383,57 +614,83 @@ async def google_search(query, is_news=False, date_before=None):
     timeout = ClientTimeout(total=70)
 
     try:
-        async with ClientSession(timeout=timeout) as session:
-            async with session.post(url, headers=headers, data=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    items = data.get('news' if is_news else 'organic', [])
-                    write(f"[google_search] Found {len(items)} raw results")
-
-                    filtered_items = []
-                    for item in items:
-                        item_url = item.get('link')
-                        item_date_str = item.get('date', '')
-                        item_date = parse_date(item_date_str)
-                        if date_before:
-                            if item_date != "Unknown" and validate_time(date_before, item_date):
-                                write(f"[google_search] ✅ Keeping: {item_url} (date: {item_date})")
-                                filtered_items.append(item)
-                            else:
-                                write(f"[google_search] ❌ Dropped by date: {item_url} (date: {item_date})")
-                        else:
-                            write(f"[google_search] ✅ Keeping: {item_url}")
+        session = get_session("serper")
+        async with rate_limited("serper") as limiter, \
+                session.post(url, headers=headers, data=payload, timeout=timeout) as response:
+            if response.status == 429:
+                limiter.penalize(retry_after_seconds(response.headers, 10))
+            if response.status == 200:
+                data = await response.json()
+                items = data.get('news' if is_news else 'organic', [])
+                write(f"[google_search] Found {len(items)} raw results")
+
+                # Parsed once per query; items are compared as dates
+                before = date_utils.parse_date(date_before) if date_before else None
+                filtered_items = []
+                for item in items:
+                    item_url = item.get('link')
+                    item_date = date_utils.parse_date(item.get('date', ''))
+                    if date_before:
+                        if item_date is not None and before is not None and item_date <= before:
+                            write(f"[google_search] ✅ Keeping: {item_url} (date: {format_date(item_date)})")
                             filtered_items.append(item)
+                        else:
+                            write(f"[google_search] ❌ Dropped by date: {item_url} (date: {format_date(item_date)})")
+                    else:
+                        write(f"[google_search] ✅ Keeping: {item_url}")
+                        filtered_items.append(item)
 
-                        if len(filtered_items) >=12:
-                            break
-                    
-                    urls = [item['link'] for item in filtered_items]
-                    write(f"[google_search] Returning {len(urls)} URLs: {urls}")
-                    return urls
-                else:
-                    write(f"[google_search] Error in Serper API response: Status {response.status}")
-                    response.raise_for_status()
+                    if len(filtered_items) >=12:
+                        break
+                
+                urls = [item['link'] for item in filtered_items]
+                write(f"[google_search] Returning {len(urls)} URLs: {urls}")
+                return urls
+            else:
+                write(f"[google_search] Error in Serper API response: Status {response.status}")
+                response.raise_for_status()
     except Exception as e:
         write(f"[google_search] Exception: {str(e)}")
         raise
 
 
-async def call_gpt(prompt, step=1):
-    client = OpenAI(api_key=OPENAI_API_KEY)
+async def _call_o3(prompt):
+    return await create_response("o3", prompt)
 
+
+async def call_gpt(prompt, step=1):
     try:
-        response = client.responses.create(
-            model="o3",
-            input=prompt
-        )
-        return response.output_text
+        return await cached_completion(lambda: _call_o3(prompt), model="o3", system="", prompt=prompt)
+    except LLMCacheMiss:
+        raise  # replay runs must fail on a miss, not score an error string
     except Exception as e:
         write(f"[call_gpt] Error: {str(e)}")
         return f"Error calling OpenAI API: {str(e)}"
 
 
-async def google_search_and_scrape(query, is_news, question_details, date_before=None):
+def select_articles(query, urls, results, limit, title=None, caller="select_articles"):
+    """
+    Picks up to `limit` (url, content) pairs among the extraction `results` worth
+    reading: at least 100 words, ranked by relevance to the query (and question
+    title), near-duplicates removed. Equal scores keep Google's order.
+    """
+    candidates = {}
+    for url in urls:
+        data = results.get(url)
+        if data is None:
+            continue
+        content = (data.content or '').strip()
+        if len(content.split()) < 100:
+            write(f"[{caller}] ⚠️ Skipping low-content article: {url}")
+            continue
+        candidates[url] = content
+    ranked = rank_articles(query, candidates, title=title, limit=limit)
+    for url, score in ranked:
+        write(f"[{caller}] 📈 Selected {url} (BM25 {score:.2f})")
+    return [(url, candidates[url]) for url, _ in ranked]
+
+
+async def google_search_and_scrape(query, is_news, question_details, date_before=None, search_session=None):
     write(f"[google_search_and_scrape] Called with query='{query}', is_news={is_news}, date_before={date_before}")
     try:
         urls = await google_search(query, is_news, date_before)
@@ -442,30 +699,54 @@ async def google_search_and_scrape(query, is_news, question_details, date_before
             write(f"[google_search_and_scrape] ❌ No URLs returned for query: '{query}'")
             return f"<Summary query=\"{query}\">No URLs returned from Google.</Summary>\n"
 
-        async with FastContentExtractor() as extractor:
-            write(f"[google_search_and_scrape] 🔍 Starting content extraction for {len(urls)} URLs")
-            results = await extractor.extract_content(urls)
-            write(f"[google_search_and_scrape] ✅ Finished content extraction")
-
         summarize_tasks = []
         no_results = 3
         valid_urls = []
-        for url, data in results.items():
-            if len(summarize_tasks) >= no_results:
-                break  
-            content = (data.get('content') or '').strip()
-            if len(content.split()) < 100:
-                write(f"[google_search_and_scrape] ⚠️ Skipping low-content article: {url}")
-                continue
-            if content:
-                truncated = content[:8000]
-                write(f"[google_search_and_scrape] ✂️ Truncated content for summarization: {len(truncated)} chars from {url}")
-                summarize_tasks.append(
-                    asyncio.create_task(summarize_article(truncated, question_details))
+        selector = ArticleSelector(query, title=question_details.get("title"), limit=no_results)
+        deferred = {}
+
+        def start_summary(url, content):
+            truncated = content[:8000]
+            write(f"[google_search_and_scrape] ✂️ Truncated content for summarization: {len(truncated)} chars from {url}")
+            if search_session is not None:
+                summary = search_session.run(
+                    "summary", url,
+                    lambda: summarize_article(truncated, question_details),
+                    normalize=False,
                 )
-                valid_urls.append(url)
             else:
-                write(f"[google_search_and_scrape] ⚠️ No content for {url}, skipping summarization.")
+                summary = summarize_article(truncated, question_details)
+            summarize_tasks.append(asyncio.create_task(summary))
+            valid_urls.append(url)
+
+        # Summaries start as soon as relevant articles arrive; the slowest fetches are
+        # cancelled once enough have been found.
+        write(f"[google_search_and_scrape] 🔍 Streaming content extraction for {len(urls)} URLs")
+        if search_session is not None:
+            stream = search_session.iter_extract(urls)
+        else:
+            stream = FastContentExtractor().iter_content(urls)
+        try:
+            async for data in stream:
+                url = data.url
+                content = (data.content or '').strip()
+                if len(content.split()) < 100:
+                    write(f"[google_search_and_scrape] ⚠️ Skipping low-content article: {url}")
+                    continue
+                if selector.offer(url, content):
+                    write(f"[google_search_and_scrape] ⚡ Relevant article arrived, summarizing: {url}")
+                    start_summary(url, content)
+                    if selector.done:
+                        write(f"[google_search_and_scrape] ✅ Found {no_results} articles, cancelling remaining fetches")
+                        break
+                else:
+                    deferred[url] = content
+        finally:
+            await stream.aclose()
+
+        for url, score in selector.remaining():
+            write(f"[google_search_and_scrape] 📈 Selected {url} (BM25 {score:.2f})")
+            start_summary(url, deferred[url])
 
         if not summarize_tasks:
             write("[google_search_and_scrape] ⚠️ Warning: No content to summarize")
@@ -489,7 +770,7 @@ async def google_search_and_scrape(query, is_news, question_details, date_before
         return f"<Summary query=\"{query}\">Error during search and scrape: {str(e)}</Summary>\n"
     
 
-async def google_search_agentic(query, is_news=False):
+async def google_search_agentic(query, is_news=False, seen_urls=None, max_page_chars=8000):
     """
     Performs Google search and returns raw article content without summarization.
     Used for agentic search where the agent will analyze the raw content.
@@ -497,6 +778,9 @@ async def google_search_agentic(query, is_news=False):
     Args:
         query: Search query string
         is_news: Whether to search Google News (True) or regular Google (False)
+        seen_urls: URLs the agent has already read; they are only referenced, and
+            the returned pages are added to the set
+        max_page_chars: Characters of content included per page
         
     Returns:
         Formatted string with raw article contents
@@ -516,24 +800,16 @@ async def google_search_agentic(query, is_news=False):
 
         output = ""
         no_results = 3
-        results_count = 0
-        
-        for url, data in results.items():
-            if results_count >= no_results:
-                break
-                
-            content = (data.get('content') or '').strip()
-            if len(content.split()) < 100:
-                write(f"[google_search_agentic] ⚠️ Skipping low-content article: {url}")
-                continue
-                
-            if content:
-                truncated = content[:8000]
-                write(f"[google_search_agentic] ✂️ Including content: {len(truncated)} chars from {url}")
-                output += f"\n<RawContent source=\"{url}\">\n{truncated}\n</RawContent>\n"
-                results_count += 1
-            else:
-                write(f"[google_search_agentic] ⚠️ No content for {url}, skipping.")
+        for url, content in select_articles(query, urls, results, no_results, caller="google_search_agentic"):
+            if seen_urls is not None:
+                if url in seen_urls:
+                    write(f"[google_search_agentic] ♻️ Already read in an earlier step: {url}")
+                    output += f"\n<RawContent source=\"{url}\">\nAlready provided above or in your previous analysis.\n</RawContent>\n"
+                    continue
+                seen_urls.add(url)
+            truncated = content[:max_page_chars]
+            write(f"[google_search_agentic] ✂️ Including content: {len(truncated)} chars from {url}")
+            output += f"\n<RawContent source=\"{url}\">\n{truncated}\n</RawContent>\n"
 
         if not output:
             write("[google_search_agentic] ⚠️ Warning: No usable content found")
@@ -550,12 +826,17 @@ async def google_search_agentic(query, is_news=False):
 
 
 
-async def process_search_queries(response: str, forecaster_id: str, question_details: dict):
+async def process_search_queries(response: str, forecaster_id: str, question_details: dict,
+                                 search_session: SearchSession = None):
     """
     Parses out search queries from the forecaster's response, executes them
     (AskNews, Agent or Google/Google News), and returns formatted summaries.
     Note: Agent replaces the previous Perplexity functionality.
+    Forecasters of the same question should share one `search_session`, so that
+    near-duplicate queries, scrapes and summaries run only once.
     """
+    if search_session is None:
+        search_session = SearchSession()
     try:
         # 1) Extract the "Search queries:" block
         search_queries_block = re.search(r'(?:Search queries:)(.*)', response, re.DOTALL | re.IGNORECASE)
@@ -609,18 +890,17 @@ async def process_search_queries(response: str, forecaster_id: str, question_det
 
             if source in ("Google", "Google News"):
                 # pass question_details through so summarizer can fill the prompt
-                tasks.append(
-                    google_search_and_scrape(
-                        query,
-                        is_news=(source == "Google News"),
-                        question_details=question_details,
-                        date_before=question_details.get("resolution_date")
-                    )
-                )
+                tasks.append(search_session.run(source, query, lambda query=query, source=source: google_search_and_scrape(
+                    query,
+                    is_news=(source == "Google News"),
+                    question_details=question_details,
+                    date_before=question_details.get("resolution_date"),
+                    search_session=search_session
+                )))
             elif source == "Assistant":
-                tasks.append(call_asknews(query))
+                tasks.append(search_session.run(source, query, lambda query=query: call_asknews(query)))
             elif source == "Agent":
-                tasks.append(agentic_search(query))
+                tasks.append(search_session.run(source, query, lambda query=query: agentic_search(query)))
 
         if not tasks:
             write(f"Forecaster {forecaster_id}: No tasks generated")
@@ -0,0 +1,104 @@
+import asyncio
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List
+from FastContentExtractor import EXTRACTION_TIMEOUT, FastContentExtractor, iter_completed
+from extraction_result import ExtractionResult
+
+"""
+Per-question search session. The historical and current prompts of a question
+often propose near-identical queries and land on the same URLs; the session runs
+each distinct search, page scrape and article summary once and hands the result
+to every caller, including callers that arrive while the work is still in flight.
+"""
+
+# Comparison and relation words ("over", "under", "between", "vs") are kept: they
+# change what a query asks for
+STOP_WORDS = frozenset("""
+a an the and or of in on at to for from by with about as into
+is are was were be been being will would should could can may might do does did
+what when where which who whom why how this that these those it its
+""".split())
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def write(x):
+    print(x)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form used to detect duplicate queries: case, quotes, punctuation and
+    stop-words are ignored; word order is kept ("Israel attacks Iran" and "Iran
+    attacks Israel" are different searches).
+    """
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = PUNCTUATION_RE.sub(" ", text)
+    words = [w for w in text.split() if w not in STOP_WORDS]
+    if not words:  # a query made only of stop-words keeps them
+        words = text.split()
+    return " ".join(words)
+
+
+class SearchSession:
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Future] = {}
+        self._pages: Dict[str, asyncio.Future] = {}
+        self._page_readers: Counter = Counter()
+        self._extractor = FastContentExtractor()
+        self.hits = 0
+        self.misses = 0
+
+    async def run(self, kind: str, key: Hashable, factory: Callable[[], Awaitable[Any]],
+                  normalize: bool = True) -> Any:
+        """
+        Returns the result of `factory()` for (kind, key), starting it only if no
+        caller has asked for the same work yet. With `normalize`, string keys are
+        compared as queries (see normalize_query). The shared task is shielded, so
+        a cancelled caller does not cancel the work for the others.
+        """
+        task_key = (kind, normalize_query(key) if normalize and isinstance(key, str) else key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(factory())
+            self._tasks[task_key] = task
+        else:
+            self.hits += 1
+            write(f"[search_session] ♻️ Reusing {kind} result for {key}")
+        return await asyncio.shield(task)
+
+    async def iter_extract(self, urls: List[str], timeout: float = EXTRACTION_TIMEOUT) -> AsyncIterator[ExtractionResult]:
+        """
+        Yields extraction results for `urls` as they complete, fetching only the
+        pages no earlier call has requested. Closing the iterator early cancels
+        the fetches that no other caller is still reading.
+        """
+        urls = list(dict.fromkeys(urls))
+        reused = 0
+        for url in urls:
+            if url in self._pages:
+                reused += 1
+            else:
+                self._pages[url] = asyncio.ensure_future(self._extractor.extract_one(url))
+            self._page_readers[url] += 1
+        if reused:
+            write(f"[search_session] ♻️ Reusing {reused} already requested page(s)")
+        self.hits += reused
+        self.misses += len(urls) - reused
+
+        try:
+            async for result in iter_completed({self._pages[url]: url for url in urls}, timeout):
+                yield result
+        finally:
+            for url in urls:
+                self._page_readers[url] -= 1
+                future = self._pages.get(url)
+                if self._page_readers[url] == 0 and future is not None and not future.done():
+                    future.cancel()
+                    del self._pages[url]  # a later request fetches it again
+
+    def summary(self) -> str:
+        return f"{self.misses} searches/scrapes run, {self.hits} served from the session"
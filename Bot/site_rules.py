@@ -0,0 +1,83 @@
+import json
+import os
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from lxml.cssselect import CSSSelector, SelectorError
+
+"""
+Registry of per-site extraction rules (content selectors, selectors to strip, and the
+cookies/headers/wait time a site needs), loaded from site_rules.json. Rules are keyed
+by domain and looked up by the host's label suffixes, longest first, so a lookup
+costs one dict probe per label however many sites are configured; "nytimes.com"
+covers www.nytimes.com and cooking.nytimes.com but not notnytimes.com. Selectors are
+compiled to XPath once, when the rules are loaded.
+"""
+
+SITE_RULES_PATH = os.getenv("SITE_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "site_rules.json"))
+
+
+def compile_selectors(selectors: List[str], domain: str = "") -> List[CSSSelector]:
+    compiled = []
+    for selector in selectors:
+        try:
+            compiled.append(CSSSelector(selector))
+        except SelectorError as e:
+            print(f"[site_rules] ⚠️ Skipping invalid selector {selector!r} for {domain or 'default'}: {e}")
+    return compiled
+
+
+class SiteRule:
+    __slots__ = ("domain", "config", "selectors", "remove_selectors")
+
+    def __init__(self, domain: str, config: dict):
+        self.domain = domain
+        self.config = config
+        self.selectors = compile_selectors(config.get("selectors", []), domain)
+        self.remove_selectors = compile_selectors(config.get("remove_selectors", []), domain)
+
+    def __repr__(self) -> str:
+        return f"SiteRule({self.domain!r}, {len(self.selectors)} selectors, {len(self.remove_selectors)} remove_selectors)"
+
+
+class SiteRules:
+    def __init__(self, configs: Dict[str, dict]):
+        self.configs = configs
+        self._rules: Dict[str, SiteRule] = {}
+        for domain, config in configs.items():
+            key = domain.strip().lower().rstrip(".")
+            if key.startswith("www."):
+                key = key[4:]
+            self._rules[key] = SiteRule(key, config)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def lookup(self, url: str) -> Optional[SiteRule]:
+        """Rule of the most specific configured domain that `url`'s host belongs to."""
+        host = urlsplit(url if "//" in url else f"//{url}").hostname or ""
+        labels = host.rstrip(".").split(".")
+        for i in range(len(labels)):
+            rule = self._rules.get(".".join(labels[i:]))
+            if rule is not None:
+                return rule
+        return None
+
+
+def load_site_rules(path: str = SITE_RULES_PATH) -> SiteRules:
+    try:
+        with open(path, encoding="utf-8") as f:
+            configs = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[site_rules] ⚠️ Could not load {path}: {e}")
+        configs = {}
+    return SiteRules(configs)
+
+
+_rules: Optional[SiteRules] = None
+
+
+def get_site_rules() -> SiteRules:
+    global _rules
+    if _rules is None:
+        _rules = load_site_rules()
+    return _rules